@@ -0,0 +1,245 @@
+"""Read-only JSON API for dashboards: leaderboards, user scores and posted questions.
+
+Routes are added to the keep-alive Flask app (see keep_alive.py):
+
+    GET /api/leaderboard?category=all|insight|contributor&page=1&per_page=25
+    GET /api/users/<user_id>
+    GET /api/questions?page=1&per_page=25
+
+Requests are served from an in-memory snapshot. The data files are re-read
+only when one of them changes (mtime/size/inode). The snapshot's version is a
+hash of the content it serves, so a rewrite that changes nothing visible, such
+as a vote, keeps the snapshot and its ETags. Each encoded response is cached
+per snapshot, plain and gzipped, each with its own ETag, so a repeated request
+costs one stat() per file plus a dict lookup. If-None-Match gets 304 Not
+Modified.
+
+Only questions that have already been posted are exposed, so upcoming
+questions are not spoiled. "Posted" means up to the last question the gateway
+recorded as posted in user_stats.json (see participation.record_question). It
+is not derived from the date, because today's question only goes out at noon.
+"""
+import gzip
+import hashlib
+import json
+import os
+import threading
+
+from flask import Response, request
+
+import storage
+from leaderboard import CATEGORIES, get_rank, rankings
+
+MAX_PER_PAGE = 100
+DEFAULT_PER_PAGE = 25
+MAX_CACHED_RESPONSES = 512  # per snapshot; uncommon page sizes beyond this are encoded per request
+MIN_GZIP_SIZE = 512
+
+
+class Snapshot:
+    def __init__(self, version, scores, questions, upcoming):
+        self.version = version
+        self.scores = scores
+        self.questions = questions
+        self.upcoming = upcoming
+        self.leaderboards = {cat.lower(): rankings(scores, cat) for cat in CATEGORIES}
+        # user id -> 1-based position, per category
+        self.positions = {
+            cat: {entry[0]: i for i, entry in enumerate(lb, start=1)}
+            for cat, lb in self.leaderboards.items()
+        }
+        self.responses = {}  # cache key -> (etag, body, gzip etag or None, gzipped body or None)
+
+
+class SnapshotStore:
+    def __init__(self, scores_file, questions_file, stats_file):
+        self.scores_file = scores_file
+        self.questions_file = questions_file
+        self.stats_file = stats_file
+        self.snapshot = None
+        self._files = None  # stat signature the snapshot was loaded from
+        self._lock = threading.Lock()
+
+    def _signature(self):
+        sig = []
+        for path in (self.scores_file, self.questions_file, self.stats_file):
+            try:
+                st = os.stat(path)
+                sig.append((st.st_mtime_ns, st.st_size, st.st_ino))
+            except OSError:
+                sig.append(None)
+        return sig
+
+    def current(self):
+        files = self._signature()
+        snap = self.snapshot
+        if snap is not None and files == self._files:
+            return snap
+        with self._lock:
+            if self.snapshot is None or files != self._files:
+                scores = storage.load_json(self.scores_file, {})
+                questions = storage.load_json(self.questions_file, [])
+                last = storage.load_json(self.stats_file, {}).get("guild", {}).get("last_question")
+                posted = 0 if last is None else max(0, min(last + 1, len(questions)))
+                content = json.dumps([scores, questions[:posted], len(questions) - posted], sort_keys=True)
+                version = hashlib.sha1(content.encode()).hexdigest()[:16]
+                if self.snapshot is None or self.snapshot.version != version:
+                    self.snapshot = Snapshot(version, scores, questions[:posted], len(questions) - posted)
+                self._files = files
+            return self.snapshot
+
+
+def _page_args():
+    try:
+        page = max(1, int(request.args.get("page", 1)))
+        per_page = min(MAX_PER_PAGE, max(1, int(request.args.get("per_page", DEFAULT_PER_PAGE))))
+    except ValueError:
+        return None
+    return page, per_page
+
+
+def _paginate(items, page, per_page):
+    pages = max(1, (len(items) + per_page - 1) // per_page)
+    start = (page - 1) * per_page
+    return items[start:start + per_page], pages
+
+
+def _entry(position, uid, ins, con, pts):
+    return {
+        "rank": position,
+        "user_id": uid,
+        "insight_points": ins,
+        "contribution_points": con,
+        "points": pts,
+        "title": get_rank(ins + con),
+    }
+
+
+def _accepts_gzip(accept_encoding):
+    """True if an Accept-Encoding header allows gzip, honouring q-values (gzip;q=0 refuses it)."""
+    q = {}
+    for part in accept_encoding.split(","):
+        coding, *params = part.split(";")
+        coding = coding.strip().lower()
+        weight = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        q[coding] = weight
+    return q.get("gzip", q.get("x-gzip", q.get("*", 0.0))) > 0
+
+
+def _error(status, message):
+    return Response(json.dumps({"error": message}), status=status, mimetype="application/json")
+
+
+def _respond(snap, key, build):
+    cached = snap.responses.get(key)
+    if cached is None:
+        payload = build()
+        if payload is None:
+            return _error(404, "not found")
+        payload["version"] = snap.version
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        etag = '"%s-%s"' % (snap.version, hashlib.sha1(body).hexdigest()[:12])
+        gz_etag = gz = None
+        if len(body) >= MIN_GZIP_SIZE:
+            # Strong validators must differ between content codings
+            gz_etag, gz = etag[:-1] + '-gz"', gzip.compress(body)
+        cached = (etag, body, gz_etag, gz)
+        if len(snap.responses) < MAX_CACHED_RESPONSES:
+            snap.responses[key] = cached
+    etag, body, gz_etag, gz = cached
+
+    headers = {"Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+
+    # Either variant's tag means the client's copy is current; the 304 confirms the one it holds
+    if_none_match = request.headers.get("If-None-Match", "")
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    for tag in (etag, gz_etag):
+        if tag is not None and (tag in tags or "*" in tags):
+            return Response(status=304, headers={**headers, "ETag": tag})
+
+    if gz is not None and _accepts_gzip(request.headers.get("Accept-Encoding", "")):
+        etag, body = gz_etag, gz
+        headers["Content-Encoding"] = "gzip"
+    headers["ETag"] = etag
+    return Response(body, status=200, headers=headers, mimetype="application/json")
+
+
+def init_app(app, scores_file, questions_file, stats_file):
+    store = SnapshotStore(scores_file, questions_file, stats_file)
+
+    @app.route("/api/leaderboard")
+    def api_leaderboard():
+        category = request.args.get("category", "all").lower()
+        args = _page_args()
+        snap = store.current()
+        if args is None or category not in snap.leaderboards:
+            return _error(400, "invalid category or paging parameters")
+        page, per_page = args
+
+        def build():
+            lb = snap.leaderboards[category]
+            items, pages = _paginate(lb, page, per_page)
+            start = (page - 1) * per_page
+            return {
+                "category": category,
+                "page": page,
+                "per_page": per_page,
+                "pages": pages,
+                "total": len(lb),
+                "entries": [_entry(start + i, *e) for i, e in enumerate(items, start=1)],
+            }
+
+        return _respond(snap, ("leaderboard", category, page, per_page), build)
+
+    @app.route("/api/users/<user_id>")
+    def api_user(user_id):
+        snap = store.current()
+
+        def build():
+            s = snap.scores.get(user_id)
+            if s is None:
+                return None
+            ins, con = s.get("insight_points", 0), s.get("contribution_points", 0)
+            return {
+                "user_id": user_id,
+                "insight_points": ins,
+                "contribution_points": con,
+                "points": ins + con,
+                "title": get_rank(ins + con),
+                "ranks": {cat: snap.positions[cat].get(user_id) for cat in snap.positions},
+            }
+
+        return _respond(snap, ("user", user_id), build)
+
+    @app.route("/api/questions")
+    def api_questions():
+        args = _page_args()
+        if args is None:
+            return _error(400, "invalid paging parameters")
+        page, per_page = args
+        snap = store.current()
+
+        def build():
+            items, pages = _paginate(snap.questions, page, per_page)
+            return {
+                "page": page,
+                "per_page": per_page,
+                "pages": pages,
+                "total": len(snap.questions),
+                "upcoming": snap.upcoming,
+                "questions": [
+                    {"id": q.get("id"), "question": q.get("question"), "submitter": q.get("submitter")}
+                    for q in items
+                ],
+            }
+
+        return _respond(snap, ("questions", page, per_page), build)
+
+    return store
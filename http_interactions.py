@@ -0,0 +1,163 @@
+"""Serve Discord interactions from an aiohttp endpoint instead of the gateway.
+
+Discord POSTs each interaction, signed with Ed25519, to the Interactions Endpoint
+URL. Each request is verified and then fed through discord.py's own dispatch. That
+means the app commands, persistent views, dynamic items and modals in main.py run
+unchanged. Handlers respond through the REST callback endpoint as usual. This
+endpoint waits until they have acknowledged, then answers Discord with 202.
+
+Run it with ``python main.py interactions`` on the same host, and in the same
+working directory, as the gateway process (``python main.py``). The scheduled
+phases stay in the gateway. The two processes share the daily state, scores and
+stats only through the local JSON files and flock in storage.py. Separate
+containers or hosts (e.g. Procfile ``web``/``worker`` dynos) would each get
+their own copy of those files, so multi-host workers need a shared backend that
+this bot does not have yet.
+
+For local testing there is no need for a bot token or Discord. Generate a key
+pair, set the client up offline and POST self-signed requests:
+
+    signing_key, public_key = generate_keypair()   # DISCORD_PUBLIC_KEY=public_key
+    await prepare_offline(client, application_id)
+    app = create_app(client, public_key)
+    headers = sign_request(signing_key, body)
+
+tests/test_http_interactions.py drives PING, slash-command and modal-submit
+payloads through this path.
+"""
+import asyncio
+import json
+import time
+
+import discord
+from aiohttp import web
+
+try:
+    from nacl.exceptions import BadSignatureError
+    from nacl.signing import SigningKey, VerifyKey
+except ImportError:  # PyNaCl is only needed in interactions mode
+    SigningKey = VerifyKey = None
+
+PING = 1
+MODAL_SUBMIT = 5
+PONG = 1
+
+ACK_TIMEOUT = 2.5  # Discord drops interactions that are not acknowledged within 3s
+MAX_CLOCK_SKEW = 300  # Reject replayed requests with stale timestamps (seconds)
+
+
+def _require_nacl():
+    if VerifyKey is None:
+        raise RuntimeError("❌ PyNaCl is required for interactions mode (pip install PyNaCl)")
+
+
+def verify_signature(verify_key, signature, timestamp, body):
+    try:
+        verify_key.verify(timestamp.encode() + body, bytes.fromhex(signature))
+    except (BadSignatureError, ValueError):
+        return False
+    return True
+
+
+def generate_keypair():
+    """Return (signing_key_hex, public_key_hex) for self-signed local testing."""
+    _require_nacl()
+    key = SigningKey.generate()
+    return key.encode().hex(), key.verify_key.encode().hex()
+
+
+def sign_request(signing_key_hex, body, timestamp=None):
+    """Headers Discord would send with ``body``, signed with a local test key."""
+    _require_nacl()
+    timestamp = str(int(time.time()) if timestamp is None else timestamp)
+    signed = SigningKey(bytes.fromhex(signing_key_hex)).sign(timestamp.encode() + body)
+    return {
+        "X-Signature-Ed25519": signed.signature.hex(),
+        "X-Signature-Timestamp": timestamp,
+        "Content-Type": "application/json",
+    }
+
+
+async def prepare_offline(client, application_id):
+    """Do what client.login() sets up for dispatch, without a token or network.
+
+    Gives the client its event loop and a bot user, which parse_interaction_create needs.
+    Responses still go through the REST callback, so tests should stub that out.
+    """
+    await client._async_setup_hook()
+    state = client._connection
+    state.application_id = int(application_id)
+    state.user = discord.ClientUser(state=state, data={
+        "id": str(application_id), "username": "qotd-local", "discriminator": "0", "avatar": None,
+    })
+
+
+def create_app(client, public_key, modal_factory=None, ack_timeout=ACK_TIMEOUT):
+    _require_nacl()
+    verify_key = VerifyKey(bytes.fromhex(public_key))
+    state = client._connection
+
+    async def handle(request):
+        # One budget for the whole request: dispatch and the handler's acknowledgement share it
+        deadline = time.monotonic() + ack_timeout
+        body = await request.read()
+        signature = request.headers.get("X-Signature-Ed25519", "")
+        timestamp = request.headers.get("X-Signature-Timestamp", "")
+        if not timestamp.isdigit() or abs(time.time() - int(timestamp)) > MAX_CLOCK_SKEW:
+            return web.Response(status=401, text="invalid request signature")
+        if not verify_signature(verify_key, signature, timestamp, body):
+            return web.Response(status=401, text="invalid request signature")
+
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return web.Response(status=400, text="invalid JSON")
+
+        if payload.get("type") == PING:
+            return web.json_response({"type": PONG})
+
+        # The modal may have been opened by another worker; rebuild it from its custom_id
+        if payload.get("type") == MODAL_SUBMIT and modal_factory:
+            custom_id = payload["data"]["custom_id"]
+            if custom_id not in state._view_store._modals:
+                modal = modal_factory(custom_id)
+                if modal is not None:
+                    state.store_view(modal)
+
+        interaction_id = int(payload["id"])
+        waiter = asyncio.ensure_future(
+            client.wait_for("interaction", check=lambda i: i.id == interaction_id,
+                            timeout=max(0, deadline - time.monotonic()))
+        )
+        await asyncio.sleep(0)  # let wait_for register its listener before dispatching
+        try:
+            state.parse_interaction_create(payload)
+        except Exception:
+            waiter.cancel()
+            raise
+
+        try:
+            interaction = await waiter
+        except asyncio.TimeoutError:
+            return web.Response(status=500, text="interaction was not dispatched")
+
+        while not interaction.response.is_done() and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        return web.Response(status=202)
+
+    app = web.Application()
+    app.router.add_post("/interactions", handle)
+    return app
+
+
+async def serve(client, public_key, host="0.0.0.0", port=8080, **kwargs):
+    app = create_app(client, public_key, **kwargs)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    print(f"🌐 Interactions endpoint listening on http://{host}:{port}/interactions")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -7,9 +7,13 @@ app = Flask('')
 def home():
     return "Bot is alive!"
 
-def run():
-    app.run(host='0.0.0.0', port=8080)
+def run(port=8080):
+    app.run(host='0.0.0.0', port=port)
 
-def keep_alive():
-    t = Thread(target=run)
+def keep_alive(port=8080, **api_config):
+    # api_config (scores_file, questions_file, stats_file) also mounts the read-only JSON API
+    if api_config:
+        import api
+        api.init_app(app, **api_config)
+    t = Thread(target=run, args=(port,), daemon=True)
     t.start()
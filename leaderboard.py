@@ -0,0 +1,30 @@
+"""Score ranking shared by the /leaderboard command and the read-only JSON API."""
+
+CATEGORIES = ("All", "Insight", "Contributor")
+
+
+def get_rank(total):
+    if total <= 10:
+        return "🍚 Rice Rookie"
+    elif total <= 25:
+        return "🥢 Miso Mind"
+    elif total <= 40:
+        return "🍣 Sashimi Scholar"
+    elif total <= 75:
+        return "🌶️ Wasabi Wizard"
+    elif total <= 99:
+        return "🍱 Sushi Sensei"
+    else:
+        return "🍣 Master Sushi Chef"
+
+
+def rankings(scores, cat):
+    """Users with points in ``cat``, best first, as (uid, insight, contribution, points)."""
+    lb = []
+    for uid, s in scores.items():
+        ins, con = s.get("insight_points", 0), s.get("contribution_points", 0)
+        pts = ins + con if cat == "All" else ins if cat == "Insight" else con
+        if pts > 0:
+            lb.append((uid, ins, con, pts))
+    lb.sort(key=lambda x: x[3], reverse=True)
+    return lb
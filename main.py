@@ -1,5 +1,4 @@
 import discord
-import json
 import datetime
 from discord.ext import tasks
 from discord import app_commands
@@ -8,56 +7,111 @@ import logging
 from datetime import time
 import os
 import asyncio
+import math
+import sys
+import participation
+from leaderboard import get_rank, rankings
+import profiling
+import ratelimit
+import storage
 NOTIFY_USER_ID = int(os.getenv('NOTIFY_USER_ID', 0))  # Fallback to 0 (invalid) if not set
 
 
+# --- Admission control: per-user token buckets, (capacity, tokens per second) ---
+# Buckets live in this process's memory. Each process that receives interactions (the
+# gateway, or each `main.py interactions` worker) grants its own full budget, so
+# N workers let a user through N times these limits.
+RATE_LIMITS = {
+    "command": (5, 1 / 2),  # slash commands
+    "button": (5, 1 / 2),  # question, leaderboard and paging buttons
+    "modal": (3, 1 / 10),  # modal submits
+    "vote": (4, 1 / 10),  # vote clicks; each one edits the whole voting message
+    "dm": (3, 1 / 60),  # DMs forwarded to the admin channel
+}
+limiter = ratelimit.TokenBucketLimiter(RATE_LIMITS)
+
+async def admit(interaction, action):
+    retry_after = limiter.acquire(action, interaction.user.id)
+    if not retry_after:
+        return True
+    await interaction.response.send_message(f"⏳ Slow down! Try again in {math.ceil(retry_after)}s.", ephemeral=True)
+    return False
+
+class Throttled:
+    """Mixin for views, modals and dynamic items; discord.py runs interaction_check before every callback."""
+    rate_action = "button"
+
+    async def interaction_check(self, interaction):
+        return await admit(interaction, self.rate_action)
+
+
 # --- Add VotingView and VoteButton classes here ---
 
 # Update VotingView and VoteButton to accept display_name:
 
+def tally_votes(answers, votes):
+    counts = {uid: 0 for uid, _, _ in answers}
+    for voted_for in votes.values():
+        if voted_for in counts:
+            counts[voted_for] += 1
+    return counts
+
 class VotingView(View):
-    def __init__(self, answers):  # answers: list of (uid, display_name, answer)
+    def __init__(self, answers, votes=None, disabled=False):  # answers: list of (uid, display_name, answer)
         super().__init__(timeout=None)
         self.answers = answers
-        self.vote_counts = {uid: 0 for uid, _, _ in answers}
-        self.user_votes = {}
+        self.vote_counts = tally_votes(answers, votes or {})
 
         for idx, (uid, display_name, _) in enumerate(answers):
             label = f"Vote for answer #{idx+1} ({display_name})"
-            self.add_item(VoteButton(label=label, uid=uid, parent=self))
+            self.add_item(VoteButton(uid, label=label, disabled=disabled))
+
+# Votes live in the shared daily state and the button carries the answer's uid in its
+# custom_id, so any process (gateway or HTTP worker) can handle a click.
+class VoteButton(Throttled, discord.ui.DynamicItem[Button], template=r"qotd:vote:(?P<uid>\d+)"):
+    rate_action = "vote"
+
+    def __init__(self, uid, label="Vote", disabled=False):
+        super().__init__(Button(label=label, style=discord.ButtonStyle.primary, custom_id=f"qotd:vote:{uid}", disabled=disabled))
+        self.uid = str(uid)
 
-class VoteButton(Button):
-    def __init__(self, label, uid, parent):
-        super().__init__(label=label, style=discord.ButtonStyle.primary)
-        self.uid = uid
-        self.parent = parent
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["uid"], label=item.label, disabled=item.disabled)
 
     async def callback(self, interaction: discord.Interaction):
         user_id = str(interaction.user.id)
-        parent = self.parent
 
-        if user_id == str(self.uid):
+        if user_id == self.uid:
             await interaction.response.send_message("❌ You cannot vote for your own answer.", ephemeral=True)
             return
 
-        if user_id in parent.user_votes:
-            previous_vote = parent.user_votes[user_id]
-            if previous_vote == self.uid:
-                await interaction.response.send_message("You already voted for this answer.", ephemeral=True)
-                return
+        with update_state() as state:
+            if not state["voting_open"]:
+                previous_vote = None
             else:
-                parent.vote_counts[previous_vote] -= 1
+                previous_vote = state["votes"].get(user_id)
+                state["votes"][user_id] = self.uid
+            voting_open, answers, votes = state["voting_open"], state["voting"], dict(state["votes"])
 
-        parent.user_votes[user_id] = self.uid
-        parent.vote_counts[self.uid] += 1
+        if not voting_open:
+            await interaction.response.send_message("❌ Voting is closed.", ephemeral=True)
+            return
+        if previous_vote == self.uid:
+            await interaction.response.send_message("You already voted for this answer.", ephemeral=True)
+            return
+        if previous_vote is None:
+            with update_stats() as st:
+                participation.record_vote(st, user_id)
 
+        view = VotingView(answers, votes)
         desc_lines = []
-        for idx, (uid, display_name, answer) in enumerate(parent.answers, start=1):
-            count = parent.vote_counts.get(uid, 0)
+        for idx, (uid, display_name, answer) in enumerate(answers, start=1):
+            count = view.vote_counts.get(uid, 0)
             desc_lines.append(f"Answer #{idx} ({display_name}): {answer} — {count} vote{'s' if count != 1 else ''}")
 
         vote_summary = "\n".join(desc_lines)
-        await interaction.response.edit_message(content=f"Current votes:\n{vote_summary}", view=parent)
+        await interaction.response.edit_message(content=f"Current votes:\n{vote_summary}", view=view)
 
 
 logging.basicConfig(level=logging.INFO)
@@ -72,63 +126,88 @@ GUILD_ID = int(os.getenv('GUILD_ID'))
 
 QUESTIONS_FILE = 'questions.json'
 SCORES_FILE = 'user_scores.json'
+STATE_FILE = 'daily_state.json'  # Submission/voting state shared with interaction workers
+STATS_FILE = 'user_stats.json'  # Participation aggregates behind /stats (see participation.py)
 START_DATE = datetime.date(2025, 6, 25)
 # --- Voting and submission tracking ---
-submission_open = True
-voting_message = None
-voting_view = None
-current_votes = {}
-answer_log = {}  # Stores answers by user: {user_id: {"answer": ..., "user": ..., "anonymous": bool}}
+voting_message = None  # Only known to the gateway process that posted it
+profiler = None  # profiling.HandlerProfiler when PROFILE_HANDLERS is set
 
 intents = discord.Intents.default()
 intents.message_content = True
 intents.guilds = True
 intents.members = True
 client = discord.Client(intents=intents)
-tree = app_commands.CommandTree(client)
+class QotdCommandTree(app_commands.CommandTree):
+    async def interaction_check(self, interaction):
+        return await admit(interaction, "command")
+
+tree = QotdCommandTree(client)
 
 def load_questions():
-    try:
-        with open(QUESTIONS_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return []
+    return storage.load_json(QUESTIONS_FILE, [])
 
 def save_questions(questions):
-    with open(QUESTIONS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(questions, f, indent=2)
+    storage.save_json(QUESTIONS_FILE, questions)
+
+def update_questions():
+    return storage.update_json(QUESTIONS_FILE, [])
 
 def load_scores():
-    try:
-        with open(SCORES_FILE, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
-        return {}
+    return storage.load_json(SCORES_FILE, {})
 
 def save_scores(scores):
-    with open(SCORES_FILE, 'w', encoding='utf-8') as f:
-        json.dump(scores, f, indent=2)
-
-def get_rank(total):
-    if total <= 10:
-        return "🍚 Rice Rookie"
-    elif total <= 25:
-        return "🥢 Miso Mind"
-    elif total <= 40:
-        return "🍣 Sashimi Scholar"
-    elif total <= 75:
-        return "🌶️ Wasabi Wizard"
-    elif total <= 99:
-        return "🍱 Sushi Sensei"
-    else:
-        return "🍣 Master Sushi Chef"
+    storage.save_json(SCORES_FILE, scores)
+
+def update_scores():
+    return storage.update_json(SCORES_FILE, {})
+
+def new_daily_state():
+    return {
+        "submission_open": True,
+        "answers": {},  # {user_id: {"answer": ..., "anonymous": bool}}
+        "voting_open": False,
+        "voting": [],  # [(uid, display_name, answer), ...] shown on the voting message
+        "votes": {},  # {voter_id: uid voted for}
+    }
+
+def load_state():
+    return storage.load_json(STATE_FILE, new_daily_state())
+
+def update_state():
+    return storage.update_json(STATE_FILE, new_daily_state())
+
+def load_stats():
+    return storage.load_json(STATS_FILE, participation.new_stats())
+
+def update_stats():
+    return storage.update_json(STATS_FILE, participation.new_stats())
+
+def init_stats():
+    # Seed the aggregates once from existing scores; from then on they are kept up to date as events happen
+    with storage.locked(STATS_FILE):
+        if not os.path.exists(STATS_FILE):
+            stats = participation.backfill(participation.new_stats(), load_scores(), todays_question_index() + 1)
+            storage.save_json(STATS_FILE, stats)
+
+def get_channel(channel_id):
+    # Interaction workers have no gateway cache, so fall back to a REST-only channel
+    return client.get_channel(channel_id) or client.get_partial_messageable(channel_id)
+
+def current_date():
+    return datetime.date.today()
+
+def todays_question_index():
+    return (current_date() - START_DATE).days
 
 def is_admin(interaction: discord.Interaction) -> bool:
-    return interaction.user.guild_permissions.administrator or interaction.user.guild_permissions.manage_messages
+    # Resolved from the interaction payload, so it also works without a member cache
+    perms = interaction.permissions
+    return perms.administrator or perms.manage_messages
 
 async def post_question():
     questions = load_questions()
-    idx = (datetime.date.today() - START_DATE).days
+    idx = todays_question_index()
     if idx < 0 or idx >= len(questions):
         return
     q = questions[idx]
@@ -141,41 +220,67 @@ async def post_question():
 
     ch = client.get_channel(CHANNEL_ID)
     await ch.send(f"{question}\n\n{submitter_text}", view=QuestionView(idx))
+    return idx
     
-class QuestionView(View):
-    def __init__(self, qid):
+# Persistent view: fixed custom_ids so it is registered once per process (see
+# register_persistent_views) and keeps working across restarts and workers.
+class QuestionView(Throttled, View):
+    def __init__(self, qid=None):
         super().__init__(timeout=None)
         self.qid = qid
 
-    @discord.ui.button(label="Answer Freely ⭐ (+1 Insight Point)", style=discord.ButtonStyle.primary)
+    def question_id(self):
+        return self.qid if self.qid is not None else todays_question_index()
+
+    @discord.ui.button(label="Answer Freely ⭐ (+1 Insight Point)", style=discord.ButtonStyle.primary, custom_id="qotd:question:free")
     async def freely(self, interaction, button):
-        await interaction.response.send_modal(AnswerModal(self.qid, interaction.user))
+        await interaction.response.send_modal(AnswerModal(self.question_id(), interaction.user))
 
-    @discord.ui.button(label="Answer Anonymously 🔒 (0 Insight Points)", style=discord.ButtonStyle.secondary)
+    @discord.ui.button(label="Answer Anonymously 🔒 (0 Insight Points)", style=discord.ButtonStyle.secondary, custom_id="qotd:question:anon")
     async def anon(self, interaction, button):
-        await interaction.response.send_modal(AnonModal(self.qid, interaction.user))
+        await interaction.response.send_modal(AnonModal(self.question_id(), interaction.user))
+
+
+# Modal custom_ids encode everything needed to rebuild them (see rebuild_modal), because
+# the submit may reach a different worker than the one that opened the modal.
+class MemberModal(Throttled, Modal):
+    """A modal opened for one member. The member id in its custom_id keeps each member's
+    modal separate in the ViewStore. The custom_id comes from the client, so it is only
+    checked against the signed-in interaction.user, never trusted as the identity."""
+    rate_action = "modal"
+
+    def __init__(self, custom_id, user):
+        super().__init__(custom_id=custom_id)
+        self.user_id = user.id
 
+    async def interaction_check(self, interaction):
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message("❌ This form belongs to someone else.", ephemeral=True)
+            return False
+        return await super().interaction_check(interaction)
 
-class AnswerModal(Modal, title="Answer the Question"):
-    answer = TextInput(label="Your answer", style=discord.TextStyle.paragraph)
+class AnswerModal(MemberModal, title="Answer the Question"):
+    answer = TextInput(label="Your answer", style=discord.TextStyle.paragraph, custom_id="answer")
 
     def __init__(self, qid, user):
-        super().__init__()
+        super().__init__(f"qotd:answer:{qid}:{user.id}", user)
         self.qid = qid
-        self.user = user
 
     async def on_submit(self, inter):
-        if not submission_open:
+        if not load_state()["submission_open"]:
             await inter.response.send_message("❌ Submissions are closed for today.", ephemeral=True)
             return
+        if self.qid != todays_question_index():
+            # A modal left open from an earlier day; submissions have reopened for a new question
+            await inter.response.send_message("❌ That question has closed. Answer today's question instead.", ephemeral=True)
+            return
 
-        scores = load_scores()
-        uid = str(self.user.id)
-        scores.setdefault(uid, {"insight_points": 0, "contribution_points": 0, "answered": []})
-        if self.qid not in scores[uid]["answered"]:
-            scores[uid]["insight_points"] += 1
-            scores[uid]["answered"].append(self.qid)
-            save_scores(scores)
+        uid = str(inter.user.id)
+        with update_scores() as scores:
+            scores.setdefault(uid, {"insight_points": 0, "contribution_points": 0, "answered": []})
+            if self.qid not in scores[uid]["answered"]:
+                scores[uid]["insight_points"] += 1
+                scores[uid]["answered"].append(self.qid)
         total = scores[uid]["insight_points"] + scores[uid]["contribution_points"]
         msg = (
             f"📝 <@{uid}>: {self.answer.value}\n"
@@ -183,34 +288,35 @@ class AnswerModal(Modal, title="Answer the Question"):
         )
         await inter.response.send_message(msg)
 
-        answer_log[str(self.user.id)] = {
-            "answer": self.answer.value,
-            "user": self.user,
-            "anonymous": False
-        }
+        with update_state() as state:
+            state["answers"][uid] = {"answer": self.answer.value, "anonymous": False}
+        with update_stats() as st:
+            participation.record_answer(st, uid, self.qid)
 
-class AnonModal(Modal, title="Answer Anonymously"):
-    answer = TextInput(label="Anonymous answer", style=discord.TextStyle.paragraph)
+class AnonModal(MemberModal, title="Answer Anonymously"):
+    answer = TextInput(label="Anonymous answer", style=discord.TextStyle.paragraph, custom_id="answer")
 
     def __init__(self, qid, user):
-        super().__init__()
+        super().__init__(f"qotd:anon:{qid}:{user.id}", user)
         self.qid = qid
-        self.user = user
 
     async def on_submit(self, inter):
-        if not submission_open:
+        if not load_state()["submission_open"]:
             await inter.response.send_message("❌ Submissions are closed for today.", ephemeral=True)
             return
+        if self.qid != todays_question_index():
+            # A modal left open from an earlier day; submissions have reopened for a new question
+            await inter.response.send_message("❌ That question has closed. Answer today's question instead.", ephemeral=True)
+            return
 
-        admin_ch = client.get_channel(ADMIN_CHANNEL_ID)
+        admin_ch = get_channel(ADMIN_CHANNEL_ID)
         await admin_ch.send(f"📩 Anonymous (QID {self.qid}): {self.answer.value}")
         await inter.response.send_message("✅ Received anonymously.", ephemeral=True)
 
-        answer_log[str(self.user.id)] = {
-            "answer": self.answer.value,
-            "user": self.user,
-            "anonymous": True
-        }
+        with update_state() as state:
+            state["answers"][str(inter.user.id)] = {"answer": self.answer.value, "anonymous": True}
+        with update_stats() as st:
+            participation.record_answer(st, inter.user.id, self.qid, anonymous=True)
 @client.event
 async def on_ready():
     print(f"✅ Logged in as {client.user} ({client.user.id})")
@@ -221,6 +327,13 @@ async def on_ready():
     except Exception as e:
         print(f"❌ Failed to sync commands: {e}")
 
+    init_stats()
+
+    if profiler:
+        profiler.start_watchdog()
+
+    register_persistent_views()
+
     purge_channel_before_post.start()
     notify_upcoming_question.start()
     post_daily_message.start()
@@ -243,7 +356,13 @@ async def notify_upcoming_question():
 
 @tasks.loop(time=time(hour=12, minute=0))
 async def post_daily_message():
-    await post_question()
+    # New question, new day: reopen submissions and forget yesterday's answers
+    with storage.locked(STATE_FILE):
+        storage.save_json(STATE_FILE, new_daily_state())
+    qid = await post_question()
+    if qid is not None:
+        with update_stats() as st:
+            participation.record_question(st, qid)
 
 @tasks.loop(time=time(hour=16, minute=50))
 async def submission_warning():
@@ -252,15 +371,16 @@ async def submission_warning():
 
 @tasks.loop(time=time(hour=17, minute=0))
 async def close_submissions():
-    global submission_open
-    submission_open = False
+    with update_state() as state:
+        state["submission_open"] = False
     channel = client.get_channel(CHANNEL_ID)
     await channel.send("🔒 Submissions are now closed for today's question. Voting will begin in 5 minutes Thank you!")
 @tasks.loop(time=time(hour=17, minute=5))
 async def start_voting():
-    global voting_message, submission_open
+    global voting_message
 
-    if submission_open:
+    state = load_state()
+    if state["submission_open"]:
         return  # Don’t start voting if submissions are still open
 
     channel = client.get_channel(CHANNEL_ID)
@@ -268,7 +388,7 @@ async def start_voting():
 
     # Prepare answers for voting: include display name with user ID and answer
     answers = []
-    for uid, data in answer_log.items():
+    for uid, data in state["answers"].items():
         if not data["anonymous"]:
             member = guild.get_member(int(uid))
             display_name = member.display_name if member else f"User {uid}"
@@ -278,6 +398,11 @@ async def start_voting():
         await channel.send("⚠️ No answers were submitted for voting today. Anonymous answers can't be voted on.")
         return
 
+    with update_state() as state:
+        state["voting_open"] = True
+        state["voting"] = answers
+        state["votes"] = {}
+
     view = VotingView(answers)
     content_lines = ["Vote for the best answer!"]
     for idx, (uid, display_name, ans) in enumerate(answers, start=1):
@@ -295,15 +420,15 @@ async def end_voting():
 
     channel = client.get_channel(CHANNEL_ID)
 
-    # Disable voting buttons so no more votes can be cast
-    view = voting_message.view
-    if view:
-        for child in view.children:
-            child.disabled = True
-        await voting_message.edit(view=view)
+    # Close voting and disable the buttons so no more votes can be cast
+    with update_state() as state:
+        state["voting_open"] = False
+        answers, votes = state["voting"], state["votes"]
+    view = VotingView(answers, votes, disabled=True)
+    await voting_message.edit(view=view)
 
     # Tally votes
-    vote_counts = voting_message.view.vote_counts if voting_message.view else None
+    vote_counts = view.vote_counts
     if not vote_counts:
         await channel.send("⚠️ No votes were cast today.")
         voting_message = None
@@ -313,18 +438,20 @@ async def end_voting():
     max_votes = max(vote_counts.values())
     winners = [uid for uid, count in vote_counts.items() if count == max_votes]
 
+    with update_stats() as st:
+        participation.record_results(st, vote_counts, winners if max_votes else [])
+
     if max_votes == 0:
         await channel.send("No votes received today.")
         voting_message = None
         return
 
     # Award points to winners and send congrats message
-    scores = load_scores()
-    for winner_uid in winners:
-        uid = str(winner_uid)
-        scores.setdefault(uid, {"insight_points": 0, "contribution_points": 0, "answered": []})
-        scores[uid]["insight_points"] += 1
-    save_scores(scores)
+    with update_scores() as scores:
+        for winner_uid in winners:
+            uid = str(winner_uid)
+            scores.setdefault(uid, {"insight_points": 0, "contribution_points": 0, "answered": []})
+            scores[uid]["insight_points"] += 1
 
     winner_mentions = [f"<@{uid}>" for uid in winners]
     if len(winner_mentions) == 1:
@@ -344,12 +471,24 @@ async def end_voting():
     # Reset voting state
     voting_message = None
 
+scheduled_tasks = [
+    purge_channel_before_post,
+    notify_upcoming_question,
+    post_daily_message,
+    submission_warning,
+    close_submissions,
+    start_voting,
+    end_voting,
+]
+
 
 @client.event
 async def on_message(msg):
     if msg.author == client.user:
         return
     if msg.guild is None:
+        if limiter.acquire("dm", msg.author.id):
+            return  # Throttled: drop quietly rather than spend more API calls
         admin_ch = client.get_channel(ADMIN_CHANNEL_ID)
         await admin_ch.send(f"📩 DM: {msg.content}")
         await msg.channel.send("✅ Received anonymously.")
@@ -358,13 +497,26 @@ async def on_message(msg):
 async def question_commands(interaction):
     await interaction.response.send_message(
         "Commands:\n"
-        "/submitquestion\n/score\n/leaderboard\n/ranks\n\n"
+        "/submitquestion\n/score\n/stats\n/leaderboard\n/ranks\n\n"
         "ADMIN ONLY COMMANDS:\n"
         "/removequestion\n/questionlist\n"
-        "/addinsightpoints\n/addcontributorpoints\n/removeinsightpoints\n/removecontributorpoints",
+        "/addinsightpoints\n/addcontributorpoints\n/removeinsightpoints\n/removecontributorpoints\n/ratelimitstats",
         ephemeral=True
     )
 
+@tree.command(name="ratelimitstats", description="Admin-only: show this process's rate limiting counters")
+async def rate_limit_stats(interaction):
+    if not is_admin(interaction):
+        return await interaction.response.send_message("❌ No permission.", ephemeral=True)
+    st = limiter.stats()
+    lines = [f"Counters for the process that handled this command only (pid {os.getpid()}):"]
+    lines += [
+        f"**{action}** — ✅ {st['admitted'].get(action, 0)} admitted | ⛔ {st['throttled'].get(action, 0)} throttled"
+        for action in RATE_LIMITS
+    ]
+    lines.append(f"Tracked buckets: {st['tracked']} | Evicted: {st['evicted']}")
+    await interaction.response.send_message("\n".join(lines), ephemeral=True)
+
 @tree.command(name="ranks", description="View sushi ranks and point ranges")
 async def ranks(interaction: discord.Interaction):
     ranks_description = """
@@ -390,37 +542,36 @@ For scores of 100 points and above.
 """
     await interaction.response.send_message(ranks_description, ephemeral=False)
 
-class SubmitModal(Modal, title="Submit a Question"):
-    q = TextInput(label="Your question", style=discord.TextStyle.paragraph, max_length=500)
+class SubmitModal(MemberModal, title="Submit a Question"):
+    q = TextInput(label="Your question", style=discord.TextStyle.paragraph, max_length=500, custom_id="question")
 
     def __init__(self, user):
-        super().__init__()
-        self.user = user
+        super().__init__(f"qotd:submit:{user.id}", user)
 
     async def on_submit(self, inter):
         try:
-            qs = load_questions()
-            ids = [int(x["id"]) for x in qs if "id" in x]
-            nid = str(max(ids) + 1 if ids else 1)
-            qs.append({"id": nid, "question": self.q.value, "submitter": str(self.user.id)})
-            save_questions(qs)
-
-            sc = load_scores()
-            uid = str(self.user.id)
-            today = str(datetime.date.today())
-            sc.setdefault(uid, {"insight_points": 0, "contribution_points": 0, "answered": [], "last_contrib": None})
-            if sc[uid]["last_contrib"] != today:
-                sc[uid]["contribution_points"] += 1
-                sc[uid]["last_contrib"] = today
-                save_scores(sc)
+            with update_questions() as qs:
+                ids = [int(x["id"]) for x in qs if "id" in x]
+                nid = str(max(ids) + 1 if ids else 1)
+                qs.append({"id": nid, "question": self.q.value, "submitter": str(inter.user.id)})
+
+            uid = str(inter.user.id)
+            today = str(current_date())
+            with update_scores() as sc:
+                sc.setdefault(uid, {"insight_points": 0, "contribution_points": 0, "answered": [], "last_contrib": None})
+                awarded = sc[uid].get("last_contrib") != today
+                if awarded:
+                    sc[uid]["contribution_points"] += 1
+                    sc[uid]["last_contrib"] = today
+            if awarded:
                 await inter.response.send_message(f"✅ Submitted! ID `{nid}` +1 contribution point", ephemeral=True)
             else:
                 await inter.response.send_message(f"✅ Submitted! ID `{nid}` (already got today's point)", ephemeral=True)
 
             # --- Notify admins/mods here ---
             guild = inter.guild
-            member = guild.get_member(self.user.id) if guild else None
-            display_name = member.display_name if member else f"{self.user.name}#{self.user.discriminator}"
+            member = guild.get_member(inter.user.id) if guild else None
+            display_name = member.display_name if member else f"{inter.user.name}#{inter.user.discriminator}"
 
             notify_msg = f"🧠 @{display_name} has submitted a new question. Use /listquestions to view the question and use /removequestion if moderation is needed."
 
@@ -441,39 +592,17 @@ class SubmitModal(Modal, title="Submit a Question"):
 async def submit_question(interaction):
     await interaction.response.send_modal(SubmitModal(interaction.user))
 
-from discord.ui import View, Button
-import discord
-
 class QuestionListView(View):
     def __init__(self, questions, page=0):
-        super().__init__(timeout=180)
+        super().__init__(timeout=None)
         self.questions = questions
-        self.page = page
         self.per_page = 10
         self.max_page = (len(self.questions) - 1) // self.per_page
-        self.update_buttons()
-
-    def update_buttons(self):
-        self.clear_items()
-
-        prev = Button(label="Previous", style=discord.ButtonStyle.secondary, disabled=self.page == 0)
-        next = Button(label="Next", style=discord.ButtonStyle.secondary, disabled=self.page == self.max_page)
-
-        async def prev_callback(interaction):
-            self.page -= 1
-            await self.update_message(interaction)
-
-        async def next_callback(interaction):
-            self.page += 1
-            await self.update_message(interaction)
-
-        prev.callback = prev_callback
-        next.callback = next_callback
+        self.page = max(0, min(page, self.max_page))
+        self.add_item(QuestionPageButton(self.page - 1, "Previous", disabled=self.page == 0))
+        self.add_item(QuestionPageButton(self.page + 1, "Next", disabled=self.page == self.max_page))
 
-        self.add_item(prev)
-        self.add_item(next)
-
-    async def update_message(self, interaction):
+    def embed(self):
         start = self.page * self.per_page
         end = start + self.per_page
         current = self.questions[start:end]
@@ -488,9 +617,22 @@ class QuestionListView(View):
         )
 
         embed.set_footer(text=f"Page {self.page + 1} of {self.max_page + 1}")
+        return embed
+
+class QuestionPageButton(Throttled, discord.ui.DynamicItem[Button], template=r"qotd:questions:(?P<page>-?\d+)"):
+    def __init__(self, page, label, disabled=False):
+        super().__init__(Button(label=label, style=discord.ButtonStyle.secondary, disabled=disabled, custom_id=f"qotd:questions:{page}"))
+        self.page = page
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(int(match["page"]), item.label, item.disabled)
 
-        self.update_buttons()
-        await interaction.response.edit_message(embed=embed, view=self)
+    async def callback(self, interaction):
+        if not is_admin(interaction):
+            return await interaction.response.send_message("❌ No permission.", ephemeral=True)
+        view = QuestionListView(load_questions(), self.page)
+        await interaction.response.edit_message(embed=view.embed(), view=view)
 
 @tree.command(name="questionlist", description="Admin-only: list questions")
 async def question_list(interaction: discord.Interaction):
@@ -502,24 +644,20 @@ async def question_list(interaction: discord.Interaction):
         return await interaction.response.send_message("⚠️ No questions found.", ephemeral=True)
 
     view = QuestionListView(questions)
-    embed = discord.Embed(
-        title="📋 Question List",
-        description="\n".join(f"`{q['id']}`: {q['question']}" for q in questions[:10]),
-        color=discord.Color.blue()
-    )
-    embed.set_footer(text=f"Page 1 of {(len(questions) - 1) // 10 + 1}")
-    await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+    await interaction.response.send_message(embed=view.embed(), view=view, ephemeral=True)
 
 @tree.command(name="removequestion", description="Admin-only: remove question")
 @app_commands.describe(question_id="ID to remove")
 async def remove_question(interaction, question_id: str):
     if not is_admin(interaction):
         return await interaction.response.send_message("❌ No permission.", ephemeral=True)
-    qs = load_questions()
-    new = [q for q in qs if q["id"] != question_id]
+    with storage.locked(QUESTIONS_FILE):
+        qs = load_questions()
+        new = [q for q in qs if q["id"] != question_id]
+        if len(new) != len(qs):
+            save_questions(new)
     if len(new)==len(qs):
         return await interaction.response.send_message("⚠️ Not found.", ephemeral=True)
-    save_questions(new)
     await interaction.response.send_message(f"✅ Removed `{question_id}`.", ephemeral=True)
 
 @tree.command(name="score", description="Show your score")
@@ -531,79 +669,107 @@ async def score(interaction):
         ephemeral=False
     )
 
+@tree.command(name="stats", description="Show participation stats and streaks")
+@app_commands.describe(user="Whose stats to show (defaults to you)")
+async def stats(interaction, user: discord.Member = None):
+    target = user or interaction.user
+    st = load_stats()
+    me = participation.user_summary(st, target.id, todays_question_index())
+    server = participation.guild_summary(st)
+
+    if me is None:
+        lines = [f"📊 <@{target.id}> hasn't answered a question yet."]
+    else:
+        lines = [
+            f"📊 **Stats for <@{target.id}>**",
+            f"🔥 Streak: {me['current_streak']} (best {me['best_streak']})",
+            f"📝 Answers: {me['answers']} ({me['anonymous_answers']} anonymous) — {me['participation']:.0f}% participation",
+            f"📈 More answers than {me['percentile']:.0f}% of members",
+            f"🗳️ Votes cast: {me['votes_cast']} | 👍 Votes received: {me['votes_received']} | 🏆 Wins: {me['wins']}",
+        ]
+    best = server["best_streak"]
+    lines += [
+        "",
+        f"🌐 **Server:** {server['questions']} questions, {server['answers']} answers from {server['participants']} members "
+        f"({server['answers_per_question']:.1f} per question), {server['votes']} votes",
+        f"Median member: {server['median_answers']} answers | Top 10%: {server['p90_answers']}+ answers",
+    ]
+    if best["uid"]:
+        lines.append(f"Longest streak: {best['length']} by <@{best['uid']}>")
+    await interaction.response.send_message("\n".join(lines), ephemeral=False)
+
 # ------- LEADERBOARD with category select and pagination -------
 
-class CategorySelect(Select):
-    def __init__(self, inter, scores, page=0):
+# Select and page buttons are DynamicItems (category and page live in the custom_id),
+# so they keep working from any process and after restarts.
+
+def leaderboard_page(cat, page):
+    lb = rankings(load_scores(), cat)
+
+    per=10
+    maxp=(len(lb)-1)//per if lb else 0
+    page=max(0,min(page,maxp))
+    start,end=page*per,(page+1)*per
+    slice=lb[start:end]
+
+    if not lb:
+        desc="No entries."
+    else:
+        lines=[]
+        for i,e in enumerate(slice,start+1):
+            if cat=="All":
+                uid,ins,con,tot=e
+                lines.append(f"{i}. <@{uid}> — {ins} ⭐ / {con} 💡 — {get_rank(tot)}")
+            else:
+                uid,_,_,pt=e
+                em="⭐" if cat=="Insight" else "💡"
+                lines.append(f"{i}. <@{uid}> — {pt} {em} — {get_rank(pt)}")
+        desc="\n".join(lines)
+
+    embed=discord.Embed(title=f"Leaderboard — {cat}",description=desc,color=discord.Color.green())
+    embed.set_footer(text=f"Page {page+1}/{maxp+1}")
+
+    view=View(timeout=None)
+    view.add_item(CategorySelect())
+    view.add_item(LeaderboardPageButton(cat,page-1,"Previous",disabled=page==0))
+    view.add_item(LeaderboardPageButton(cat,page+1,"Next",disabled=page==maxp))
+    return embed, view
+
+class CategorySelect(Throttled, discord.ui.DynamicItem[Select], template=r"qotd:lb:select"):
+    def __init__(self):
         opts = [
             discord.SelectOption(label="All", description="Insight + Contribution"),
             discord.SelectOption(label="Insight", description="Insight only"),
             discord.SelectOption(label="Contributor", description="Contribution only"),
         ]
-        super().__init__(placeholder="Pick a category…", min_values=1, max_values=1, options=opts)
-        self.inter = inter
-        self.scores = scores
+        super().__init__(Select(placeholder="Pick a category…", min_values=1, max_values=1, options=opts, custom_id="qotd:lb:select"))
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls()
+
+    async def callback(self, interaction):
+        embed, view = leaderboard_page(self.item.values[0], 0)
+        await interaction.response.edit_message(embed=embed, view=view)
+
+class LeaderboardPageButton(Throttled, discord.ui.DynamicItem[Button], template=r"qotd:lb:(?P<cat>All|Insight|Contributor):(?P<page>-?\d+)"):
+    def __init__(self, cat, page, label, disabled=False):
+        super().__init__(Button(label=label, style=discord.ButtonStyle.secondary, disabled=disabled, custom_id=f"qotd:lb:{cat}:{page}"))
+        self.cat = cat
         self.page = page
 
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["cat"], int(match["page"]), item.label, item.disabled)
+
     async def callback(self, interaction):
-        cat = self.values[0]
-        lb = []
-        if cat=="All":
-            for uid, s in self.scores.items():
-                ins,con = s.get("insight_points",0),s.get("contribution_points",0)
-                tot=ins+con
-                if tot>0: lb.append((uid,ins,con,tot))
-            lb.sort(key=lambda x:x[3],reverse=True)
-        elif cat=="Insight":
-            for uid,s in self.scores.items():
-                ins=s.get("insight_points",0)
-                if ins>0: lb.append((uid,ins))
-            lb.sort(key=lambda x:x[1],reverse=True)
-        else:
-            for uid,s in self.scores.items():
-                con=s.get("contribution_points",0)
-                if con>0: lb.append((uid,con))
-            lb.sort(key=lambda x:x[1],reverse=True)
-
-        per=10
-        maxp=(len(lb)-1)//per if lb else 0
-        self.page=max(0,min(self.page,maxp))
-        start,end=self.page*per,(self.page+1)*per
-        slice=lb[start:end]
-
-        if not lb:
-            desc="No entries."
-        else:
-            lines=[]
-            for i,e in enumerate(slice,start+1):
-                if cat=="All":
-                    uid,ins,con,tot=e
-                    lines.append(f"{i}. <@{uid}> — {ins} ⭐ / {con} 💡 — {get_rank(tot)}")
-                else:
-                    uid,pt=e
-                    em="⭐" if cat=="Insight" else "💡"
-                    lines.append(f"{i}. <@{uid}> — {pt} {em} — {get_rank(pt)}")
-            desc="\n".join(lines)
-
-        embed=discord.Embed(title=f"Leaderboard — {cat}",description=desc,color=discord.Color.green())
-        embed.set_footer(text=f"Page {self.page+1}/{maxp+1}")
-
-        view=View(timeout=120)
-        view.add_item(self)
-        prev=Button(label="Previous",style=discord.ButtonStyle.secondary,disabled=self.page==0)
-        nxt=Button(label="Next",style=discord.ButtonStyle.secondary,disabled=self.page==maxp)
-        async def p(i): self.page-=1; await self.callback(i)
-        async def n(i): self.page+=1; await self.callback(i)
-        prev.callback, nxt.callback = p,n
-        view.add_item(prev); view.add_item(nxt)
-
-        await interaction.response.edit_message(embed=embed,view=view)
+        embed, view = leaderboard_page(self.cat, self.page)
+        await interaction.response.edit_message(embed=embed, view=view)
 
 @tree.command(name="leaderboard", description="View the leaderboard")
 async def leaderboard(interaction):
-    scores = load_scores()
-    view = View(timeout=120)
-    view.add_item(CategorySelect(interaction, scores))
+    view = View(timeout=None)
+    view.add_item(CategorySelect())
     await interaction.response.send_message("Select a category:", view=view, ephemeral=False)
 
 # ------- ADMIN POINT COMMANDS -------
@@ -613,9 +779,10 @@ async def leaderboard(interaction):
 async def add_insight(interaction, user: discord.Member, amount: int):
     if not is_admin(interaction):
         return await interaction.response.send_message("❌ No permission.",ephemeral=True)
-    sc=load_scores();uid=str(user.id)
-    sc.setdefault(uid,{"insight_points":0,"contribution_points":0,"answered":[]})
-    sc[uid]["insight_points"]+=amount; save_scores(sc)
+    uid=str(user.id)
+    with update_scores() as sc:
+        sc.setdefault(uid,{"insight_points":0,"contribution_points":0,"answered":[]})
+        sc[uid]["insight_points"]+=amount
     await interaction.response.send_message(f"✅ +{amount} insight to {user.mention}",ephemeral=True)
 
 @tree.command(name="addcontributorpoints", description="Admin: add contribution points")
@@ -623,9 +790,10 @@ async def add_insight(interaction, user: discord.Member, amount: int):
 async def add_contrib(interaction, user: discord.Member, amount: int):
     if not is_admin(interaction):
         return await interaction.response.send_message("❌ No permission.",ephemeral=True)
-    sc=load_scores();uid=str(user.id)
-    sc.setdefault(uid,{"insight_points":0,"contribution_points":0,"answered":[]})
-    sc[uid]["contribution_points"]+=amount; save_scores(sc)
+    uid=str(user.id)
+    with update_scores() as sc:
+        sc.setdefault(uid,{"insight_points":0,"contribution_points":0,"answered":[]})
+        sc[uid]["contribution_points"]+=amount
     await interaction.response.send_message(f"✅ +{amount} contribution to {user.mention}",ephemeral=True)
 
 @tree.command(name="removeinsightpoints", description="Admin: remove insight points")
@@ -633,9 +801,10 @@ async def add_contrib(interaction, user: discord.Member, amount: int):
 async def remove_insight(interaction, user: discord.Member, amount: int):
     if not is_admin(interaction):
         return await interaction.response.send_message("❌ No permission.",ephemeral=True)
-    sc=load_scores();uid=str(user.id)
-    sc.setdefault(uid,{"insight_points":0,"contribution_points":0,"answered":[]})
-    sc[uid]["insight_points"]=max(0,sc[uid]["insight_points"]-amount); save_scores(sc)
+    uid=str(user.id)
+    with update_scores() as sc:
+        sc.setdefault(uid,{"insight_points":0,"contribution_points":0,"answered":[]})
+        sc[uid]["insight_points"]=max(0,sc[uid]["insight_points"]-amount)
     await interaction.response.send_message(f"✅ -{amount} insight from {user.mention}",ephemeral=True)
 
 @tree.command(name="removecontributorpoints", description="Admin: remove contribution points")
@@ -643,13 +812,17 @@ async def remove_insight(interaction, user: discord.Member, amount: int):
 async def remove_contrib(interaction, user: discord.Member, amount: int):
     if not is_admin(interaction):
         return await interaction.response.send_message("❌ No permission.",ephemeral=True)
-    sc=load_scores();uid=str(user.id)
-    sc.setdefault(uid,{"insight_points":0,"contribution_points":0,"answered":[]})
-    sc[uid]["contribution_points"]=max(0,sc[uid]["contribution_points"]-amount); save_scores(sc)
+    uid=str(user.id)
+    with update_scores() as sc:
+        sc.setdefault(uid,{"insight_points":0,"contribution_points":0,"answered":[]})
+        sc[uid]["contribution_points"]=max(0,sc[uid]["contribution_points"]-amount)
     await interaction.response.send_message(f"✅ -{amount} contribution from {user.mention}",ephemeral=True)
+# Seconds to wait after each phase of the test sequence, so testers can answer and vote
+TEST_SEQUENCE_PAUSES = {"post_daily_message": 20, "start_voting": 15}
+
 @tree.command(name="start_test_sequence", description="Admin only: Run full test sequence for question flow")
 async def start_test_sequence(interaction: discord.Interaction):
-    global submission_open, voting_message, voting_view, answer_log
+    global voting_message
     if not is_admin(interaction):
         return await interaction.response.send_message("❌ No permission.", ephemeral=True)
 
@@ -657,107 +830,60 @@ async def start_test_sequence(interaction: discord.Interaction):
     if channel is None:
         return await interaction.response.send_message("❌ Channel not found.", ephemeral=True)
 
-    submission_open = True
-    voting_message = None
-    voting_view = None
-    answer_log = {}
-
     await interaction.response.send_message("🚦 Starting full test sequence...", ephemeral=False)
 
-    await channel.purge(limit=1000)
-    await channel.send("🧹 Channel purged for test.")
-    await asyncio.sleep(2)
-
-    await channel.send("⏳ The next question will be posted soon!")
-    await asyncio.sleep(5)
-
-    await post_question()
-    await asyncio.sleep(3)
-
-    await channel.send("You can now answer freely or anonymously using the buttons.")
-    await asyncio.sleep(15)
-
-    await channel.send("⏳ Submissions will close in 10 minutes! Get your answers in quickly!")
-    await asyncio.sleep(10)
-
-    submission_open = False
-    await channel.send("🔒 Submissions are now closed for today's question. Voting will begin in 5 minutes Thank you!")
-    await asyncio.sleep(10)
-
-    # Prepare answers for voting
-    guild = client.get_guild(GUILD_ID)
-    answers = []
-    for uid, data in answer_log.items():
-        if not data["anonymous"]:
-            member = guild.get_member(int(uid))
-            display_name = member.display_name if member else f"User {uid}"
-            answers.append((uid, display_name, data["answer"]))
-
-    if not answers:
-        await channel.send("⚠️ No answers submitted to vote on. Note - anonymous answers are not eligible for voting")
-        return
-
-    voting_view = VotingView(answers)  # Save VotingView instance to global
-    voting_message = await channel.send(
-        "\n".join(
-            [
-                "Vote for the best answer!",
-                *[
-                    f"Answer #{idx} - submitted by <@{uid}>: \"{ans}\""
-                    for idx, (uid, display_name, ans) in enumerate(answers, start=1)
-                ],
-            ]
-        ),
-        view=voting_view,
-    )
-    await channel.send("🗳️ Voting started! Click buttons to vote.")
-
-    await asyncio.sleep(15)
-
-    if voting_message and voting_view:
-        for child in voting_view.children:
-            child.disabled = True
-        await voting_message.edit(view=voting_view)
-
-        vote_counts = voting_view.vote_counts
-        if not vote_counts:
-            await channel.send("⚠️ No votes were cast today.")
-            return
-
-        max_votes = max(vote_counts.values())
-        winners = [uid for uid, count in vote_counts.items() if count == max_votes]
+    # Run the real scheduled phases back to back instead of waiting for their times
+    voting_message = None
+    for task in scheduled_tasks:
+        await task.coro()
+        await asyncio.sleep(TEST_SEQUENCE_PAUSES.get(task.coro.__name__, 2))
 
-        if max_votes == 0:
-            await channel.send("No votes received today.")
-            return
 
-        scores = load_scores()
-        for winner_uid in winners:
-            uid = str(winner_uid)
-            scores.setdefault(uid, {"insight_points": 0, "contribution_points": 0, "answered": []})
-            scores[uid]["insight_points"] += 1
-        save_scores(scores)
+def register_persistent_views():
+    client.add_view(QuestionView())
+    client.add_dynamic_items(VoteButton, CategorySelect, LeaderboardPageButton, QuestionPageButton)
 
-        winner_names = []
-        for uid in winners:
-            member = guild.get_member(int(uid))
-            winner_names.append(f"@{member.display_name}" if member else f"User {uid}")
-
-        if len(winner_names) == 1:
-            msg = (
-                f"🏆 Congratulations {winner_names[0]} - you had the most liked answer for today's Question of the Day! "
-                f"As a reward, an ⭐ Insight point has been added to your score."
-            )
-        else:
-            winners_str = " & ".join(winner_names)
-            msg = (
-                f"🏆 Congratulations {winners_str} - you had the most liked answers for today's Question of the Day! "
-                f"As a reward, an ⭐ Insight point has been added to your scores."
-            )
-
-        await channel.send(msg)
+def rebuild_modal(custom_id):
+    """Recreate a modal opened by another process from its custom_id, or None."""
+    parts = custom_id.split(":")
+    try:
+        if parts[:2] == ["qotd", "answer"]:
+            return AnswerModal(int(parts[2]), discord.Object(id=int(parts[3])))
+        if parts[:2] == ["qotd", "anon"]:
+            return AnonModal(int(parts[2]), discord.Object(id=int(parts[3])))
+        if parts[:2] == ["qotd", "submit"]:
+            return SubmitModal(discord.Object(id=int(parts[2])))
+    except (IndexError, ValueError):
+        pass
+    return None
+
+async def serve_interactions():
+    # HTTP-only worker: REST login, no gateway connection. Scheduled phases stay in the
+    # gateway process; Discord sends interactions here once the endpoint URL is set.
+    # Run it on the gateway's host and working directory: they share state via the data files.
+    import http_interactions
+    public_key = os.getenv("DISCORD_PUBLIC_KEY")
+    if not public_key:
+        raise RuntimeError("❌ DISCORD_PUBLIC_KEY not set!")
+    await client.login(TOKEN)
+    init_stats()
+    register_persistent_views()
+    if profiler:
+        profiler.start_watchdog()
+    port = int(os.getenv("INTERACTIONS_PORT") or os.getenv("PORT") or 8080)
+    await http_interactions.serve(client, public_key, port=port, modal_factory=rebuild_modal)
+
+
+if __name__ == "__main__":
+    if profiling.enabled():
+        profiler = profiling.HandlerProfiler().install(tree, scheduled_tasks)
+        print(f"🔬 Handler profiling on (threshold {profiler.threshold * 1000:.0f}ms, reports in {profiler.out_dir}/)")
+    if sys.argv[1:2] == ["interactions"]:
+        asyncio.run(serve_interactions())
     else:
-        await channel.send("⚠️ Voting message missing or no votes to tally.")
-
-
-client.run(TOKEN)
+        if os.getenv("API_PORT"):
+            from keep_alive import keep_alive
+            keep_alive(int(os.getenv("API_PORT")), scores_file=SCORES_FILE,
+                       questions_file=QUESTIONS_FILE, stats_file=STATS_FILE)
+            print(f"📊 Read-only API listening on port {os.getenv('API_PORT')} (/api/leaderboard, /api/users/<id>, /api/questions)")
+        client.run(TOKEN)
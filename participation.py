@@ -0,0 +1,201 @@
+"""Participation aggregates, kept up to date as answers, votes and wins happen.
+
+Everything /stats shows is read straight from these counters. Nothing scans the
+per-user ``answered`` lists. The data is a plain JSON-able dict:
+
+    {"guild": {...totals, answer_hist, best_streak...}, "users": {uid: {...}}}
+
+Question ids are day indexes (see main.todays_question_index), so a streak is
+a run of consecutive question ids.
+"""
+
+
+def new_stats():
+    return {
+        "guild": {
+            "questions": 0,  # questions posted
+            "last_question": None,
+            "answers": 0,
+            "anonymous_answers": 0,
+            "votes": 0,
+            "voting_rounds": 0,
+            "answer_hist": {},  # {answer count: number of users with that count}
+            "best_streak": {"uid": None, "length": 0},
+        },
+        "users": {},
+    }
+
+
+def _user(stats, uid):
+    return stats["users"].setdefault(str(uid), {
+        "answers": 0,
+        "anonymous_answers": 0,
+        "joined_at": None,  # questions posted before the user's first answer
+        "last_qid": None,
+        "current_streak": 0,
+        "best_streak": 0,
+        "votes_cast": 0,
+        "votes_received": 0,
+        "wins": 0,
+    })
+
+
+def _move_hist(hist, old, new):
+    old, new = str(old), str(new)
+    if old in hist:
+        hist[old] -= 1
+        if not hist[old]:
+            del hist[old]
+    hist[new] = hist.get(new, 0) + 1
+
+
+def record_question(stats, qid):
+    guild = stats["guild"]
+    if guild["last_question"] != qid:
+        guild["questions"] += 1
+        guild["last_question"] = qid
+
+
+def record_answer(stats, uid, qid, anonymous=False):
+    """Count one answer per user per question and extend their streak.
+
+    Answers must arrive in question order. One for a question at or before the
+    user's last counted question is ignored.
+    """
+    guild = stats["guild"]
+    user = _user(stats, uid)
+    if user["last_qid"] is not None and qid <= user["last_qid"]:
+        return False  # already counted, or a stale answer to an earlier question
+    if user["joined_at"] is None:
+        # The question being answered is already counted in guild["questions"]
+        user["joined_at"] = max(0, guild["questions"] - 1)
+
+    if user["last_qid"] is not None and qid == user["last_qid"] + 1:
+        user["current_streak"] += 1
+    else:
+        user["current_streak"] = 1
+    user["best_streak"] = max(user["best_streak"], user["current_streak"])
+    user["last_qid"] = qid
+
+    _move_hist(guild["answer_hist"], user["answers"], user["answers"] + 1)
+    user["answers"] += 1
+    guild["answers"] += 1
+    if anonymous:
+        user["anonymous_answers"] += 1
+        guild["anonymous_answers"] += 1
+
+    if user["best_streak"] > guild["best_streak"]["length"]:
+        guild["best_streak"] = {"uid": str(uid), "length": user["best_streak"]}
+    return True
+
+
+def record_vote(stats, uid):
+    """Count a user's first vote of a round (changing a vote is not a new vote)."""
+    _user(stats, uid)["votes_cast"] += 1
+    stats["guild"]["votes"] += 1
+
+
+def record_results(stats, vote_counts, winners):
+    stats["guild"]["voting_rounds"] += 1
+    for uid, count in vote_counts.items():
+        _user(stats, uid)["votes_received"] += count
+    for uid in winners:
+        _user(stats, uid)["wins"] += 1
+
+
+def current_streak(user, today_qid):
+    # A streak survives until a whole question day passes without an answer
+    if user["last_qid"] is None or user["last_qid"] < today_qid - 1:
+        return 0
+    return user["current_streak"]
+
+
+def percentile(hist, value):
+    """Share of users (0-100) with fewer answers, counting ties as half.
+
+    Cost is O(distinct answer counts), which is bounded by the number of days, not users.
+    """
+    below = same = total = 0
+    for count, users in hist.items():
+        count = int(count)
+        total += users
+        if count < value:
+            below += users
+        elif count == value:
+            same += users
+    if not total:
+        return 0.0
+    return 100 * (below + same / 2) / total
+
+
+def hist_quantile(hist, q):
+    """Answer count at quantile q (0-1) across all users who have answered."""
+    total = sum(hist.values())
+    if not total:
+        return 0
+    target = q * total
+    seen = 0
+    for count in sorted(hist, key=int):
+        seen += hist[count]
+        if seen >= target:
+            return int(count)
+    return 0
+
+
+def user_summary(stats, uid, today_qid):
+    user = stats["users"].get(str(uid))
+    if user is None:
+        return None
+    eligible = max(1, stats["guild"]["questions"] - (user["joined_at"] or 0))
+    return {
+        "answers": user["answers"],
+        "anonymous_answers": user["anonymous_answers"],
+        "participation": min(100.0, 100 * user["answers"] / eligible),
+        "current_streak": current_streak(user, today_qid),
+        "best_streak": user["best_streak"],
+        "votes_cast": user["votes_cast"],
+        "votes_received": user["votes_received"],
+        "wins": user["wins"],
+        "percentile": percentile(stats["guild"]["answer_hist"], user["answers"]),
+    }
+
+
+def guild_summary(stats):
+    guild = stats["guild"]
+    hist = guild["answer_hist"]
+    return {
+        "questions": guild["questions"],
+        "answers": guild["answers"],
+        "anonymous_answers": guild["anonymous_answers"],
+        "participants": sum(hist.values()),
+        "answers_per_question": guild["answers"] / guild["questions"] if guild["questions"] else 0.0,
+        "votes": guild["votes"],
+        "voting_rounds": guild["voting_rounds"],
+        "median_answers": hist_quantile(hist, 0.5),
+        "p90_answers": hist_quantile(hist, 0.9),
+        "best_streak": guild["best_streak"],
+    }
+
+
+def backfill(stats, scores, questions_posted=None):
+    """One-off seed from the answered lists in user_scores.json (non-anonymous answers only).
+
+    Question ids are day indexes, so every id up to the highest one answered counts as
+    posted, answered or not. ``questions_posted`` (today's index + 1) extends that to
+    the days since the last answer.
+    """
+    answered_by = {}
+    for uid, s in scores.items():
+        for qid in s.get("answered", []):
+            answered_by.setdefault(qid, []).append(uid)
+    guild = stats["guild"]
+    for qid in sorted(answered_by):
+        # record_answer sets joined_at from this count, so it becomes the user's first qid
+        guild["questions"] = qid + 1
+        guild["last_question"] = qid
+        for uid in answered_by[qid]:
+            record_answer(stats, uid, qid)
+    if questions_posted and questions_posted > guild["questions"]:
+        guild["questions"] = questions_posted
+        guild["last_question"] = questions_posted - 1
+    return stats
@@ -0,0 +1,225 @@
+"""Opt-in slow-handler profiler and event-loop stall watchdog.
+
+Enable with PROFILE_HANDLERS=1. Every slash command, modal on_submit, component
+callback and scheduled task is timed. Calls slower than PROFILE_THRESHOLD_MS get
+a report written to PROFILE_DIR. A sampled fraction of calls (PROFILE_SAMPLE_RATE)
+run under cProfile, and their slow reports include the profile.
+
+The watchdog runs a heartbeat on the event loop and a thread that checks it. If
+the loop misses its heartbeat for STALL_THRESHOLD_MS, the thread dumps the loop
+thread's current stack and the handlers that were running at the time.
+
+Reports are written on a background thread, never on the event loop. This
+covers the pstats formatting and the .prof dump. Measuring a slow handler
+therefore adds no blocking I/O to it.
+"""
+import asyncio
+import cProfile
+import datetime
+import functools
+import io
+import itertools
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import discord
+
+
+def enabled():
+    return os.getenv("PROFILE_HANDLERS", "").lower() in ("1", "true", "yes")
+
+
+class HandlerProfiler:
+    def __init__(self, out_dir=None, threshold_ms=None, sample_rate=None, stall_threshold_ms=None):
+        self.out_dir = out_dir or os.getenv("PROFILE_DIR", "profiles")
+        self.threshold = (threshold_ms if threshold_ms is not None
+                          else float(os.getenv("PROFILE_THRESHOLD_MS", 250))) / 1000
+        self.sample_rate = (sample_rate if sample_rate is not None
+                            else float(os.getenv("PROFILE_SAMPLE_RATE", 0.1)))
+        self.stall_threshold = (stall_threshold_ms if stall_threshold_ms is not None
+                                else float(os.getenv("STALL_THRESHOLD_MS", 500))) / 1000
+        self.active = {}  # call id -> (handler name, start time)
+        self.slow_calls = 0
+        self.stalls = 0
+        self._ids = itertools.count(1)
+        self._profiling = False
+        self._last_beat = None
+        self._loop_thread = None
+        self._heartbeat_task = None
+        self._watchdog = None
+        self._stop = threading.Event()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="profile-writer")
+
+    # ------- Handler timing -------
+
+    async def run(self, name, coro_func, *args, **kwargs):
+        call_id = next(self._ids)
+        # cProfile is process-wide, so only one sampled call can be profiled at a time
+        profile = None
+        if not self._profiling and random.random() < self.sample_rate:
+            profile = cProfile.Profile()
+            self._profiling = True
+        start = time.perf_counter()
+        self.active[call_id] = (name, start)
+        try:
+            if profile:
+                profile.enable()
+            return await coro_func(*args, **kwargs)
+        finally:
+            if profile:
+                profile.disable()
+                self._profiling = False
+            del self.active[call_id]
+            elapsed = time.perf_counter() - start
+            if elapsed >= self.threshold:
+                self.slow_calls += 1
+                self._writer.submit(self._report_slow, name, elapsed, profile)
+
+    def flush(self):
+        """Block until every queued slow-handler report has been written."""
+        self._writer.submit(lambda: None).result()
+
+    def wrap(self, name, coro_func):
+        @functools.wraps(coro_func)
+        async def wrapper(*args, **kwargs):
+            return await self.run(name, coro_func, *args, **kwargs)
+        return wrapper
+
+    def _path(self, kind, name, ext):
+        os.makedirs(self.out_dir, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+        return os.path.join(self.out_dir, f"{kind}-{stamp}-{safe}.{ext}")
+
+    def _report_slow(self, name, elapsed, profile):
+        # Runs on the writer thread; the profile is already disabled
+        path = self._path("slow", name, "txt")
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"handler: {name}\nelapsed_ms: {elapsed * 1000:.1f}\n")
+                f.write(f"threshold_ms: {self.threshold * 1000:.1f}\n")
+                if profile:
+                    # Wall time includes awaits, so the profile may also show other tasks
+                    profile.dump_stats(path[:-4] + ".prof")
+                    buf = io.StringIO()
+                    pstats.Stats(profile, stream=buf).sort_stats("cumulative").print_stats(30)
+                    f.write("\n" + buf.getvalue())
+                else:
+                    f.write("(not sampled for cProfile; see stall-*.txt for blocking stacks)\n")
+        except OSError as e:
+            print(f"⚠️ Could not write profile report {path}: {e}")
+            return
+        print(f"🐢 Slow handler {name}: {elapsed * 1000:.0f}ms → {path}")
+
+    # ------- Stall watchdog -------
+
+    def start_watchdog(self):
+        """Start the heartbeat and watchdog thread. Must be called from the event loop."""
+        if self._heartbeat_task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._heartbeat_task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-stall-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop_watchdog(self):
+        self._stop.set()
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _heartbeat(self):
+        interval = self.stall_threshold / 4
+        while True:
+            self._last_beat = time.monotonic()
+            await asyncio.sleep(interval)
+
+    def _watch(self):
+        interval = self.stall_threshold / 4
+        reported = None
+        while not self._stop.wait(interval):
+            beat = self._last_beat
+            lag = time.monotonic() - beat
+            if lag < self.stall_threshold:
+                reported = None
+            elif reported != beat:
+                # One report per stall; the next one needs a fresh heartbeat first
+                reported = beat
+                self._report_stall(lag)
+
+    def _report_stall(self, lag):
+        self.stalls += 1
+        frame = sys._current_frames().get(self._loop_thread)
+        now = time.perf_counter()
+        running = sorted(dict(self.active).values(), key=lambda a: a[1])  # copy: loop thread may mutate
+        path = self._path("stall", "event-loop", "txt")
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(f"event loop stalled for at least {lag * 1000:.0f}ms\n\n")
+                f.write("running handlers:\n")
+                for name, start in running:
+                    f.write(f"  {name} ({(now - start) * 1000:.0f}ms)\n")
+                if not running:
+                    f.write("  (none)\n")
+                f.write("\nloop thread stack:\n")
+                f.write("".join(traceback.format_stack(frame)) if frame else "  (unavailable)\n")
+        except OSError as e:
+            print(f"⚠️ Could not write stall report {path}: {e}")
+            return
+        print(f"🧊 Event loop stalled {lag * 1000:.0f}ms → {path}")
+
+    # ------- Installation -------
+
+    def install(self, tree, loops=()):
+        """Wrap slash commands, component callbacks, modal submits and scheduled tasks."""
+        profiler = self
+
+        # Every slash command goes through CommandTree._call
+        call = tree._call
+
+        async def traced_call(interaction):
+            name = "/" + (interaction.data or {}).get("name", "?")
+            return await profiler.run(name, call, interaction)
+
+        tree._call = traced_call
+
+        # Buttons/selects and modal submits are dispatched through _scheduled_task
+        view_task = discord.ui.View._scheduled_task
+        modal_task = discord.ui.Modal._scheduled_task
+
+        async def traced_view_task(view, item, interaction):
+            label = getattr(item, "label", None) or getattr(item, "placeholder", None) or item.custom_id
+            name = f"{type(view).__name__}.{type(item).__name__}[{label}]"
+            return await profiler.run(name, view_task, view, item, interaction)
+
+        async def traced_modal_task(modal, interaction, *args, **kwargs):
+            name = f"{type(modal).__name__}.on_submit"
+            return await profiler.run(name, modal_task, modal, interaction, *args, **kwargs)
+
+        discord.ui.View._scheduled_task = traced_view_task
+        discord.ui.Modal._scheduled_task = traced_modal_task
+
+        # DynamicItems (vote, leaderboard and paging buttons) bypass _scheduled_task
+        store_cls = discord.ui.view.ViewStore
+        dynamic_call = store_cls.schedule_dynamic_item_call
+
+        async def traced_dynamic_call(store, component_type, factory, interaction, custom_id, match):
+            name = f"{factory.__name__}[{custom_id}]"
+            return await profiler.run(name, dynamic_call, store, component_type, factory, interaction, custom_id, match)
+
+        store_cls.schedule_dynamic_item_call = traced_dynamic_call
+
+        for loop in loops:
+            loop.coro = self.wrap(f"task:{loop.coro.__name__}", loop.coro)
+        return self
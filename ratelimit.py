@@ -0,0 +1,55 @@
+"""Per-user, per-action token buckets for admission control.
+
+Each (action, user) pair gets a bucket of ``capacity`` tokens refilled at
+``rate`` tokens per second. Buckets live in an LRU-ordered dict capped at
+``max_keys`` entries, so memory stays bounded however many users show up. An
+evicted user simply starts again with a full bucket. Buckets and counters are per
+process: with N processes handling interactions, a user gets N times each budget.
+"""
+import time
+from collections import Counter, OrderedDict
+
+
+class TokenBucketLimiter:
+    def __init__(self, limits, max_keys=10_000, clock=time.monotonic):
+        self.limits = limits  # {action: (capacity, tokens per second)}
+        self.max_keys = max_keys
+        self.clock = clock
+        self.buckets = OrderedDict()  # (action, key) -> [tokens, last refill time]
+        self.admitted = Counter()
+        self.throttled = Counter()
+        self.evicted = 0
+
+    def acquire(self, action, key):
+        """Take a token. Returns 0 if admitted, else seconds until a token is available."""
+        limit = self.limits.get(action)
+        if limit is None:
+            return 0.0
+        capacity, rate = limit
+        now = self.clock()
+        bucket_key = (action, key)
+        bucket = self.buckets.get(bucket_key)
+        if bucket is None:
+            if len(self.buckets) >= self.max_keys:
+                self.buckets.popitem(last=False)
+                self.evicted += 1
+            bucket = self.buckets[bucket_key] = [capacity, now]
+        else:
+            self.buckets.move_to_end(bucket_key)
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            self.admitted[action] += 1
+            return 0.0
+        self.throttled[action] += 1
+        return (1 - bucket[0]) / rate
+
+    def stats(self):
+        return {
+            "admitted": dict(self.admitted),
+            "throttled": dict(self.throttled),
+            "tracked": len(self.buckets),
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,515 @@
+"""Headless simulation of the daily Question of the Day cycle.
+
+Runs the real scheduled phases from main.py (purge through end_voting) and the
+real button/modal/vote handlers against an in-memory Discord backend, driven by
+a virtual clock.  Weeks of days finish in seconds, so the whole pipeline can be
+regression-tested and profiled offline.
+
+Clicks and modal submits go through discord.py's own dispatch: View and Modal
+``_scheduled_task`` and ``DynamicItem.from_custom_id``.  The interaction checks,
+including rate limiting on the virtual clock, therefore run as they do live.
+Slash commands run the tree's interaction_check and then the command callback.
+The gateway, the payload parsing and CommandTree._call are not simulated.
+
+    python simulation.py --days 28 --users 25 --seed 1
+"""
+import argparse
+import asyncio
+import datetime
+import itertools
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack, redirect_stdout
+from unittest import mock
+
+SIM_GUILD_ID = 1000
+SIM_CHANNEL_ID = 2000
+SIM_ADMIN_CHANNEL_ID = 2001
+
+# main.py reads its configuration at import time
+os.environ.setdefault("DISCORD_BOT_TOKEN", "simulation")
+os.environ.setdefault("DISCORD_CHANNEL_ID", str(SIM_CHANNEL_ID))
+os.environ.setdefault("DISCORD_ADMIN_CHANNEL_ID", str(SIM_ADMIN_CHANNEL_ID))
+os.environ.setdefault("GUILD_ID", str(SIM_GUILD_ID))
+
+import discord  # noqa: E402
+from discord.ext import tasks  # noqa: E402
+
+with redirect_stdout(sys.stderr):  # keep --json output clean
+    import main  # noqa: E402
+
+
+class VirtualClock:
+    def __init__(self, start):
+        self.now = start
+
+    def today(self):
+        return self.now.date()
+
+    def timestamp(self):
+        return self.now.timestamp()
+
+    def advance_to(self, when):
+        if when < self.now:
+            raise ValueError(f"clock cannot go backwards ({when} < {self.now})")
+        self.now = when
+
+
+# ------- Fake Discord backend -------
+
+_ids = itertools.count(1)
+
+
+class FakeMessage:
+    def __init__(self, channel, content, view=None, author=None):
+        self.id = next(_ids)
+        self.channel = channel
+        self.content = content
+        self.view = view
+        self.author = author
+        self.guild = channel.guild
+
+    async def edit(self, content=None, view=None, **kwargs):
+        if content is not None:
+            self.content = content
+        if view is not None:
+            self.view = view
+        self.channel.backend.count("message_edit")
+        return self
+
+
+class FakeChannel:
+    def __init__(self, backend, channel_id, guild=None):
+        self.backend = backend
+        self.id = channel_id
+        self.guild = guild
+        self.messages = []
+
+    async def send(self, content=None, view=None, **kwargs):
+        msg = FakeMessage(self, content, view=view, author=self.backend.bot_user)
+        self.messages.append(msg)
+        self.backend.count("message_send")
+        return msg
+
+    async def purge(self, limit=100, **kwargs):
+        deleted, self.messages = self.messages[-limit:], self.messages[:-limit]
+        self.backend.count("purged", len(deleted))
+        return deleted
+
+
+class FakePermissions:
+    def __init__(self, admin=False):
+        self.administrator = admin
+        self.manage_messages = admin
+
+
+class FakeMember:
+    def __init__(self, user_id, name, guild=None, admin=False):
+        self.id = user_id
+        self.name = name
+        self.discriminator = "0"
+        self.display_name = name
+        self.bot = False
+        self.guild = guild
+        self.guild_permissions = FakePermissions(admin)
+        self.dm_messages = []
+
+    @property
+    def mention(self):
+        return f"<@{self.id}>"
+
+    async def send(self, content=None, **kwargs):
+        self.dm_messages.append(content)
+
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+        self.members = {}
+
+    def get_member(self, user_id):
+        return self.members.get(int(user_id))
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self.modal = None
+        self.message = None
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    def _respond(self, kind):
+        if self._done:
+            raise RuntimeError("interaction already responded to")
+        self._done = True
+        self.interaction.backend.count(kind)
+
+    async def send_message(self, content=None, ephemeral=False, view=None, **kwargs):
+        self._respond("interaction_message")
+        if not ephemeral:
+            self.message = await self.interaction.channel.send(content, view=view)
+
+    async def send_modal(self, modal):
+        self._respond("interaction_modal")
+        self.modal = modal
+
+    async def edit_message(self, content=None, view=None, **kwargs):
+        self._respond("interaction_edit")
+        if self.interaction.message is not None:
+            await self.interaction.message.edit(content=content, view=view)
+
+
+class FakeInteraction:
+    def __init__(self, backend, user, channel, message=None):
+        self.backend = backend
+        self.user = user
+        self.guild = channel.guild
+        self.channel = channel
+        self.message = message
+        self.permissions = user.guild_permissions
+        self.data = {}
+        self.response = FakeResponse(self)
+
+
+class FakeBackend:
+    """In-memory stand-in for the parts of discord.Client that main.py uses."""
+
+    def __init__(self):
+        self.counters = Counter()
+        self.bot_user = FakeMember(1, "QOTD Bot")
+        self.guild = FakeGuild(main.GUILD_ID)
+        self.channels = {
+            main.CHANNEL_ID: FakeChannel(self, main.CHANNEL_ID, self.guild),
+            main.ADMIN_CHANNEL_ID: FakeChannel(self, main.ADMIN_CHANNEL_ID, self.guild),
+        }
+
+    @property
+    def channel(self):
+        return self.channels[main.CHANNEL_ID]
+
+    def count(self, key, n=1):
+        self.counters[key] += n
+
+    def add_member(self, user_id, name, admin=False):
+        member = FakeMember(user_id, name, guild=self.guild, admin=admin)
+        self.guild.members[user_id] = member
+        return member
+
+    def interaction(self, user, message=None):
+        return FakeInteraction(self, user, self.channel, message=message)
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    def get_guild(self, guild_id):
+        return self.guild if guild_id == self.guild.id else None
+
+    async def fetch_user(self, user_id):
+        return self.guild.get_member(user_id)
+
+
+# ------- Simulation driver -------
+
+class PhaseTimer:
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    async def run(self, name, coro):
+        start = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            self.samples[name].append(time.perf_counter() - start)
+
+    def summary(self):
+        out = {}
+        for name, samples in self.samples.items():
+            out[name] = {
+                "calls": len(samples),
+                "total_ms": sum(samples) * 1000,
+                "mean_ms": sum(samples) / len(samples) * 1000,
+                "max_ms": max(samples) * 1000,
+            }
+        return out
+
+
+def scheduled_phases():
+    """Every tasks.loop in main.py with a fixed time of day, in firing order."""
+    phases = []
+    for name, obj in vars(main).items():
+        if isinstance(obj, tasks.Loop) and obj.time:
+            for when in obj.time:
+                phases.append((when.replace(tzinfo=None), name, obj))
+    phases.sort(key=lambda p: p[0])
+    return phases
+
+
+async def _raise(self, interaction, error, *args):
+    # View.on_error and Modal.on_error only log; a simulation should fail loudly instead
+    raise error
+
+
+def find_button(view, label_prefix):
+    for item in view.children:
+        if isinstance(item, discord.ui.Button) and item.label.startswith(label_prefix):
+            return item
+    return None
+
+
+class Simulation:
+    def __init__(self, days=14, users=20, seed=0, start_date=None, answer_rate=0.6,
+                 anon_rate=0.15, vote_rate=0.7, submit_rate=0.05):
+        self.days = days
+        self.rng = random.Random(seed)
+        self.start_date = start_date or main.START_DATE
+        self.answer_rate = answer_rate
+        self.anon_rate = anon_rate
+        self.vote_rate = vote_rate
+        self.submit_rate = submit_rate
+        self.clock = VirtualClock(datetime.datetime.combine(self.start_date, datetime.time()))
+        self.backend = FakeBackend()
+        self.timer = PhaseTimer()
+        self.users = [self.backend.add_member(10_000 + i, f"sim_user_{i}") for i in range(users)]
+        self.phases = scheduled_phases()
+
+    async def click(self, name, message, item, inter):
+        """Press a button the way ViewStore dispatches it."""
+        view = message.view
+        if isinstance(item, discord.ui.DynamicItem):
+            match = item.template.fullmatch(item.custom_id)
+            item = await type(item).from_custom_id(inter, item.item, match)
+            item._view = view
+        await self.timer.run(name, view._scheduled_task(item, inter))
+
+    async def submit(self, modal, inter, text):
+        """Submit a modal with every text input set to ``text``."""
+        components = [
+            {"type": 1, "components": [{"type": 4, "custom_id": item.custom_id, "value": text}]}
+            for item in modal.children if isinstance(item, discord.ui.TextInput)
+        ]
+        await self.timer.run(f"{type(modal).__name__}.on_submit", modal._scheduled_task(inter, components, {}))
+
+    async def command(self, name, command, inter):
+        if await main.tree.interaction_check(inter):
+            await self.timer.run(name, command.callback(inter))
+
+    async def user_answers(self):
+        question_msg = next(
+            (m for m in reversed(self.backend.channel.messages) if isinstance(m.view, main.QuestionView)),
+            None,
+        )
+        if question_msg is None:
+            return
+        for user in self.users:
+            if self.rng.random() >= self.answer_rate:
+                continue
+            anonymous = self.rng.random() < self.anon_rate
+            button = find_button(question_msg.view, "Answer Anonymously" if anonymous else "Answer Freely")
+            inter = self.backend.interaction(user, message=question_msg)
+            await self.click("QuestionView.button", question_msg, button, inter)
+            if inter.response.modal is not None:
+                await self.submit(inter.response.modal, self.backend.interaction(user),
+                                  f"{user.display_name}'s answer for {self.clock.today()}")
+
+    async def user_submissions(self):
+        for user in self.users:
+            if self.rng.random() >= self.submit_rate:
+                continue
+            inter = self.backend.interaction(user)
+            await self.command("submitquestion", main.submit_question, inter)
+            if inter.response.modal is not None:
+                await self.submit(inter.response.modal, self.backend.interaction(user),
+                                  f"Question from {user.display_name} on {self.clock.today()}?")
+
+    async def user_votes(self):
+        message = main.voting_message
+        if message is None or message.view is None:
+            return
+        buttons = [b for b in message.view.children if isinstance(b, main.VoteButton)]
+        for user in self.users:
+            if self.rng.random() >= self.vote_rate:
+                continue
+            choices = [b for b in buttons if str(b.uid) != str(user.id)]
+            if not choices:
+                continue
+            inter = self.backend.interaction(user, message=message)
+            await self.click("VoteButton.callback", message, self.rng.choice(choices), inter)
+
+    # Activities that happen between scheduled phases, keyed by the phase they follow
+    def activities(self):
+        return {
+            "post_daily_message": [self.user_answers, self.user_submissions],
+            "start_voting": [self.user_votes],
+        }
+
+    async def run_day(self, day):
+        activities = self.activities()
+        for when, name, loop in self.phases:
+            self.clock.advance_to(datetime.datetime.combine(day, when))
+            await self.timer.run(name, loop.coro())
+            for activity in activities.get(name, []):
+                await activity()
+
+    async def run(self):
+        start = time.perf_counter()
+        for offset in range(self.days):
+            day = self.start_date + datetime.timedelta(days=offset)
+            await self.run_day(day)
+        return self.report(time.perf_counter() - start)
+
+    def report(self, wall_seconds):
+        scores = main.load_scores()
+        totals = {
+            uid: s.get("insight_points", 0) + s.get("contribution_points", 0)
+            for uid, s in scores.items()
+        }
+        return {
+            "days": self.days,
+            "users": len(self.users),
+            "wall_seconds": wall_seconds,
+            "simulated_until": self.clock.now.isoformat(),
+            "points": {
+                "insight": sum(s.get("insight_points", 0) for s in scores.values()),
+                "contribution": sum(s.get("contribution_points", 0) for s in scores.values()),
+                "top": sorted(totals.items(), key=lambda x: x[1], reverse=True)[:10],
+            },
+            "participation": main.participation.guild_summary(main.load_stats()),
+            "rate_limits": main.limiter.stats(),
+            "messages": dict(self.backend.counters),
+            "timings": self.timer.summary(),
+        }
+
+
+class DataDirError(Exception):
+    """The --data-dir given cannot be used for a simulation."""
+
+
+def prepare_data_dir(data_dir, days, start_date):
+    """Copy the question bank into data_dir, padded so every simulated day has a question.
+
+    data_dir must be new or empty, so a simulation can never overwrite the live data files.
+    """
+    data_dir = os.path.abspath(data_dir)
+    live = {os.path.abspath(f) for f in (main.QUESTIONS_FILE, main.SCORES_FILE, main.STATE_FILE, main.STATS_FILE)}
+    if any(os.path.dirname(f) == data_dir for f in live):
+        raise DataDirError(f"refusing to simulate in {data_dir}: it holds the live data files")
+    os.makedirs(data_dir, exist_ok=True)
+    if os.listdir(data_dir):
+        raise DataDirError(f"refusing to simulate in {data_dir}: directory is not empty")
+    questions = main.load_questions()
+    needed = (start_date - main.START_DATE).days + days
+    next_id = max((int(q["id"]) for q in questions), default=0) + 1
+    while len(questions) < needed:
+        questions.append({"id": next_id, "question": f"Simulated question #{next_id}", "submitter": None})
+        next_id += 1
+    questions_file = os.path.join(data_dir, "questions.json")
+    scores_file = os.path.join(data_dir, "user_scores.json")
+    state_file = os.path.join(data_dir, "daily_state.json")
+    stats_file = os.path.join(data_dir, "user_stats.json")
+    with open(questions_file, "w", encoding="utf-8") as f:
+        json.dump(questions, f, indent=2)
+    with open(scores_file, "w", encoding="utf-8") as f:
+        json.dump({}, f)
+    with open(state_file, "w", encoding="utf-8") as f:
+        json.dump(main.new_daily_state(), f)
+    with open(stats_file, "w", encoding="utf-8") as f:
+        json.dump(main.participation.new_stats(), f)
+    return questions_file, scores_file, state_file, stats_file
+
+
+async def _run(sim):
+    return await sim.run()
+
+
+def simulate(days=14, users=20, seed=0, start_date=None, data_dir=None, **rates):
+    """Run a full simulation and return its report.  Never touches the real data files."""
+    start_date = start_date or main.START_DATE
+    if start_date < main.START_DATE:
+        raise ValueError(f"start_date {start_date} is before the first question ({main.START_DATE})")
+    tmp = None
+    if data_dir is None:
+        data_dir = tmp = tempfile.mkdtemp(prefix="qotd-sim-")
+    try:
+        questions_file, scores_file, state_file, stats_file = prepare_data_dir(data_dir, days, start_date)
+        with ExitStack() as stack:
+            sim = Simulation(days=days, users=users, seed=seed, start_date=start_date, **rates)
+            for attr, value in {
+                "QUESTIONS_FILE": questions_file,
+                "SCORES_FILE": scores_file,
+                "STATE_FILE": state_file,
+                "STATS_FILE": stats_file,
+                "current_date": sim.clock.today,
+                "voting_message": None,
+                "limiter": main.ratelimit.TokenBucketLimiter(main.RATE_LIMITS, clock=sim.clock.timestamp),
+            }.items():
+                stack.enter_context(mock.patch.object(main, attr, value))
+            for cls in (discord.ui.View, discord.ui.Modal):
+                stack.enter_context(mock.patch.object(cls, "on_error", _raise))
+            for attr in ("get_channel", "get_guild", "fetch_user"):
+                stack.enter_context(mock.patch.object(main.client, attr, getattr(sim.backend, attr)))
+            return asyncio.run(_run(sim))
+    finally:
+        if tmp:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+def print_report(report):
+    print(f"🧪 Simulated {report['days']} days for {report['users']} users "
+          f"in {report['wall_seconds']:.2f}s (until {report['simulated_until']})")
+    pts = report["points"]
+    print(f"⭐ {pts['insight']} insight | 💡 {pts['contribution']} contribution")
+    for i, (uid, tot) in enumerate(pts["top"], start=1):
+        print(f"  {i}. {uid} — {tot} — {main.get_rank(tot)}")
+    part = report["participation"]
+    print(f"📊 {part['answers']} answers ({part['anonymous_answers']} anonymous) to {part['questions']} questions, "
+          f"{part['votes']} votes, longest streak {part['best_streak']['length']}")
+    print("📨 Messages:")
+    for key, n in sorted(report["messages"].items()):
+        print(f"  {key}: {n}")
+    print("⏱️ Timings:")
+    for name, t in sorted(report["timings"].items(), key=lambda x: x[1]["total_ms"], reverse=True):
+        print(f"  {name}: {t['calls']} calls, {t['total_ms']:.1f}ms total, "
+              f"{t['mean_ms']:.2f}ms mean, {t['max_ms']:.2f}ms max")
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Fast-forward the daily QOTD cycle offline")
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start-date", type=datetime.date.fromisoformat, default=None)
+    parser.add_argument("--answer-rate", type=float, default=0.6)
+    parser.add_argument("--anon-rate", type=float, default=0.15)
+    parser.add_argument("--vote-rate", type=float, default=0.7)
+    parser.add_argument("--submit-rate", type=float, default=0.05)
+    parser.add_argument("--data-dir", default=None, help="Keep the simulated data files here (must be a new or empty directory)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+    if args.start_date and args.start_date < main.START_DATE:
+        parser.error(f"--start-date must be on or after {main.START_DATE}, when the first question is posted")
+
+    try:
+        report = simulate(
+            days=args.days, users=args.users, seed=args.seed, start_date=args.start_date,
+            data_dir=args.data_dir, answer_rate=args.answer_rate, anon_rate=args.anon_rate,
+            vote_rate=args.vote_rate, submit_rate=args.submit_rate,
+        )
+    except DataDirError as e:
+        parser.error(str(e))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,70 @@
+"""JSON file storage shared between the gateway process and interaction workers.
+
+Writes are atomic (temp file + rename) and read-modify-write cycles hold an
+exclusive flock on a sidecar ``<file>.lock``, so several processes on the same
+host can share the data files safely. flock does not work across hosts or
+containers, and each of those has its own filesystem anyway. Every process that
+touches the data must run on one host, in one working directory.
+"""
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+_thread_lock = threading.RLock()
+_held = set()  # paths whose flock this process already holds (flock is not re-entrant)
+
+
+def load_json(path, default):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json(path, data):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+@contextmanager
+def locked(path):
+    """Hold an exclusive lock for ``path`` across processes. Do not await inside it."""
+    with _thread_lock:
+        if fcntl is None or path in _held:
+            yield
+            return
+        with open(path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            _held.add(path)
+            try:
+                yield
+            finally:
+                _held.discard(path)
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+@contextmanager
+def update_json(path, default):
+    """Locked read-modify-write: yields the loaded data and saves it on exit."""
+    with locked(path):
+        data = load_json(path, default)
+        yield data
+        save_json(path, data)
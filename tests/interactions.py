@@ -0,0 +1,102 @@
+"""Drive http_interactions.create_app with self-signed requests, without a token or network."""
+import asyncio
+import json
+from unittest import mock
+
+import discord
+from aiohttp.test_utils import TestClient, TestServer
+from discord import app_commands
+from discord.webhook.async_ import AsyncWebhookAdapter
+
+import http_interactions as hi
+
+APP_ID = 900
+CHANNEL_ID = 2000
+
+
+def user(user_id):
+    return {"id": str(user_id), "username": f"u{user_id}", "discriminator": "0", "avatar": None}
+
+
+def payload(type_, interaction_id, data, user_id=42, message=None):
+    body = {
+        "type": type_, "id": str(interaction_id), "application_id": str(APP_ID), "token": "tok",
+        "version": 1, "locale": "en-US", "entitlements": [], "authorizing_integration_owners": {},
+        "attachment_size_limit": 8388608, "channel_id": str(CHANNEL_ID), "guild_id": "1000",
+        "member": {
+            "user": user(user_id), "roles": [], "joined_at": None, "deaf": False, "mute": False,
+            "permissions": "0", "flags": 0,
+        },
+        "data": data,
+    }
+    if message is not None:
+        body["message"] = message
+    return body
+
+
+def command(interaction_id, name, **kwargs):
+    return payload(2, interaction_id, {"id": "5", "name": name, "type": 1}, **kwargs)
+
+
+def modal_submit(interaction_id, custom_id, values, **kwargs):
+    components = [
+        {"type": 1, "components": [{"type": 4, "custom_id": cid, "value": value}]}
+        for cid, value in values.items()
+    ]
+    return payload(5, interaction_id, {"custom_id": custom_id, "components": components}, **kwargs)
+
+
+def button_click(interaction_id, custom_id, label="Button", **kwargs):
+    """A click on a button of a bot message holding only that button."""
+    message = {
+        "id": "3000", "channel_id": str(CHANNEL_ID), "author": user(APP_ID), "content": "",
+        "timestamp": "2025-06-25T12:00:00+00:00", "edited_timestamp": None, "tts": False,
+        "mention_everyone": False, "mentions": [], "mention_roles": [], "attachments": [],
+        "embeds": [], "pinned": False, "type": 0, "flags": 0,
+        "components": [{"type": 1, "components": [
+            {"type": 2, "style": 1, "custom_id": custom_id, "label": label},
+        ]}],
+    }
+    return payload(3, interaction_id, {"custom_id": custom_id, "component_type": 2}, message=message, **kwargs)
+
+
+class Harness:
+    def __init__(self):
+        self.client = discord.Client(intents=discord.Intents.none())
+        self.tree = app_commands.CommandTree(self.client)
+        self.callbacks = []  # interaction ids acknowledged through the REST callback
+        self.http = None
+        self.signing_key = None
+
+    async def fake_callback(self, interaction_id, token, **kwargs):
+        self.callbacks.append(interaction_id)
+        return {"interaction": {"id": str(interaction_id), "type": kwargs["params"].payload["type"]}}
+
+    def sign(self, body, **kwargs):
+        return hi.sign_request(self.signing_key, body, **kwargs)
+
+    async def post(self, data):
+        body = json.dumps(data).encode()
+        return await self.http.post("/interactions", data=body, headers=self.sign(body))
+
+
+def run_offline(scenario, setup=None, **app_kwargs):
+    """Run ``await scenario(harness)`` against a fresh offline client.
+
+    ``setup(harness)`` registers commands and dynamic items before the app starts;
+    ``app_kwargs`` go to create_app.
+    """
+    async def go():
+        h = Harness()
+        if setup:
+            setup(h)
+        h.signing_key, public_key = hi.generate_keypair()
+        await hi.prepare_offline(h.client, APP_ID)
+        app = hi.create_app(h.client, public_key, **app_kwargs)
+        with mock.patch.object(AsyncWebhookAdapter, "create_interaction_response", h.fake_callback):
+            async with TestClient(TestServer(app)) as http:
+                h.http = http
+                await scenario(h)
+        await h.client.close()
+
+    asyncio.run(go())
@@ -0,0 +1,148 @@
+import gzip
+import os
+
+import pytest
+from flask import Flask
+
+import api
+import participation
+import storage
+
+
+@pytest.fixture
+def env(tmp_path):
+    scores_file, questions_file = str(tmp_path / "scores.json"), str(tmp_path / "questions.json")
+    stats_file = str(tmp_path / "stats.json")
+    storage.save_json(scores_file, {
+        str(i): {"insight_points": i % 7, "contribution_points": i % 3} for i in range(300)
+    })
+    storage.save_json(questions_file, [{"id": i, "question": f"Q{i}?", "submitter": None} for i in range(10)])
+    stats = participation.new_stats()
+    for qid in range(3):
+        participation.record_question(stats, qid)
+    storage.save_json(stats_file, stats)
+    app = Flask("test")
+    store = api.init_app(app, scores_file, questions_file, stats_file)
+    return app.test_client(), store, scores_file, stats_file
+
+
+def touch_newer(path, data):
+    # Make the rewrite visible even on filesystems with coarse mtimes
+    before = os.stat(path).st_mtime_ns
+    storage.save_json(path, data)
+    os.utime(path, ns=(before + 10**9, before + 10**9))
+
+
+def test_leaderboard_pagination_and_ranks(env):
+    client, _, _, _ = env
+    data = client.get("/api/leaderboard?category=insight&page=2&per_page=5").get_json()
+    assert data["total"] == sum(1 for i in range(300) if i % 7) and data["pages"] == -(-data["total"] // 5)
+    assert [e["rank"] for e in data["entries"]] == [6, 7, 8, 9, 10]
+    assert all(e["points"] == e["insight_points"] == 6 for e in data["entries"])
+
+
+def test_per_page_is_capped(env):
+    client, _, _, _ = env
+    assert client.get("/api/leaderboard?per_page=1000").get_json()["per_page"] == api.MAX_PER_PAGE
+
+
+def test_invalid_parameters_and_unknown_user(env):
+    client, _, _, _ = env
+    assert client.get("/api/leaderboard?category=nope").status_code == 400
+    assert client.get("/api/questions?page=x").status_code == 400
+    assert client.get("/api/users/nobody").status_code == 404
+
+
+def test_user_ranks_per_category(env):
+    client, _, _, _ = env
+    data = client.get("/api/users/6").get_json()
+    assert (data["insight_points"], data["contribution_points"], data["points"]) == (6, 0, 6)
+    assert data["ranks"]["insight"] == 1 and data["ranks"]["contributor"] is None
+
+
+def test_only_posted_questions_are_listed(env):
+    client, _, _, stats_file = env
+    data = client.get("/api/questions").get_json()
+    assert [q["id"] for q in data["questions"]] == [0, 1, 2] and data["upcoming"] == 7
+    # Morning of the next day: the date has rolled over but question 3 goes out at noon
+    stats = storage.load_json(stats_file, None)
+    participation.record_answer(stats, "1", 2)
+    touch_newer(stats_file, stats)
+    assert client.get("/api/questions").get_json()["total"] == 3
+    # post_daily_message records the question once it is posted
+    participation.record_question(stats, 3)
+    touch_newer(stats_file, stats)
+    assert client.get("/api/questions").get_json()["total"] == 4
+
+
+def test_no_questions_before_the_first_is_posted(env):
+    client, _, _, stats_file = env
+    touch_newer(stats_file, participation.new_stats())
+    data = client.get("/api/questions").get_json()
+    assert data["total"] == 0 and data["upcoming"] == 10
+
+
+def test_etag_revalidation(env):
+    client, _, _, _ = env
+    etag = client.get("/api/leaderboard").headers["ETag"]
+    r = client.get("/api/leaderboard", headers={"If-None-Match": etag})
+    assert r.status_code == 304 and r.data == b"" and r.headers["ETag"] == etag
+    assert client.get("/api/leaderboard", headers={"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+    assert client.get("/api/leaderboard", headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_gzip_only_when_accepted(env):
+    client, _, _, _ = env
+    url = "/api/leaderboard?per_page=100"
+    plain = client.get(url)
+    assert "Content-Encoding" not in plain.headers
+    zipped = client.get(url, headers={"Accept-Encoding": "br, gzip;q=0.8"})
+    assert zipped.headers["Content-Encoding"] == "gzip" and zipped.headers["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(zipped.data) == plain.data
+    for refused in ("gzip;q=0", "identity", "*;q=0", "gzip; q=0.0, br"):
+        assert "Content-Encoding" not in client.get(url, headers={"Accept-Encoding": refused}).headers
+    assert client.get(url, headers={"Accept-Encoding": "*"}).headers["Content-Encoding"] == "gzip"
+
+
+def test_each_coding_has_its_own_etag_and_either_revalidates(env):
+    client, _, _, _ = env
+    url = "/api/leaderboard?per_page=100"
+    plain_tag = client.get(url).headers["ETag"]
+    gz_tag = client.get(url, headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+    assert plain_tag != gz_tag and gz_tag.endswith('-gz"')
+    for tag in (plain_tag, gz_tag):
+        for encoding in ("gzip", "identity"):
+            r = client.get(url, headers={"If-None-Match": tag, "Accept-Encoding": encoding})
+            assert r.status_code == 304 and r.headers["ETag"] == tag
+    small = client.get("/api/users/6", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers and not small.headers["ETag"].endswith('-gz"')
+
+
+def test_unrelated_stats_rewrite_keeps_snapshot_and_etag(env):
+    client, store, _, stats_file = env
+    etag = client.get("/api/leaderboard").headers["ETag"]
+    snap = store.current()
+    stats = storage.load_json(stats_file, None)
+    participation.record_vote(stats, "1")
+    touch_newer(stats_file, stats)
+    assert store.current() is snap
+    assert client.get("/api/leaderboard", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_snapshot_and_etag_change_when_scores_change(env):
+    client, store, scores_file, _ = env
+    r = client.get("/api/leaderboard")
+    snap = store.current()
+    assert store.current() is snap  # unchanged files reuse the snapshot
+    touch_newer(scores_file, {"1": {"insight_points": 5, "contribution_points": 0}})
+    assert store.current() is not snap
+    r2 = client.get("/api/leaderboard", headers={"If-None-Match": r.headers["ETag"]})
+    assert r2.status_code == 200 and r2.get_json()["total"] == 1
+
+
+def test_responses_are_cached_per_snapshot(env):
+    client, store, _, _ = env
+    client.get("/api/leaderboard")
+    cached = store.current().responses[("leaderboard", "all", 1, api.DEFAULT_PER_PAGE)]
+    client.get("/api/leaderboard")
+    assert store.current().responses[("leaderboard", "all", 1, api.DEFAULT_PER_PAGE)] is cached
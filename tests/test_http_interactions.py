@@ -0,0 +1,128 @@
+"""Signed requests through http_interactions.create_app, without a token or network."""
+import datetime
+import json
+import time
+
+import pytest
+from discord.ui import Modal, TextInput
+
+import http_interactions as hi
+import ratelimit
+from interactions import command, modal_submit, run_offline
+
+
+class EchoModal(Modal, title="Echo"):
+    answer = TextInput(label="Answer", custom_id="answer")
+
+    def __init__(self, custom_id, seen):
+        super().__init__(custom_id=custom_id, timeout=None)
+        self.seen = seen
+
+    async def on_submit(self, interaction):
+        self.seen.append(("modal", self.custom_id, self.answer.value))
+        await interaction.response.defer()
+
+
+def test_ping_gets_pong():
+    async def scenario(h):
+        r = await h.post({"type": 1, "id": "1"})
+        assert r.status == 200
+        assert await r.json() == {"type": 1}
+    run_offline(scenario)
+
+
+def test_bad_and_stale_signatures_are_rejected():
+    async def scenario(h):
+        body = json.dumps({"type": 1, "id": "1"}).encode()
+        forged = dict(h.sign(body), **{"X-Signature-Ed25519": "00" * 64})
+        assert (await h.http.post("/interactions", data=body, headers=forged)).status == 401
+        tampered = body.replace(b'"1"', b'"2"')
+        assert (await h.http.post("/interactions", data=tampered, headers=h.sign(body))).status == 401
+        stale = h.sign(body, timestamp=int(time.time()) - hi.MAX_CLOCK_SKEW - 60)
+        assert (await h.http.post("/interactions", data=body, headers=stale)).status == 401
+        assert (await h.http.post("/interactions", data=body)).status == 401
+    run_offline(scenario)
+
+
+def test_slash_command_is_dispatched_and_acknowledged():
+    seen = []
+
+    def setup(h):
+        @h.tree.command(name="ping")
+        async def ping(interaction):
+            seen.append(("ping", interaction.user.id))
+            await interaction.response.defer()
+
+    async def scenario(h):
+        r = await h.post(command(77, "ping"))
+        assert r.status == 202
+        assert seen == [("ping", 42)]
+        assert h.callbacks == [77]
+    run_offline(scenario, setup)
+
+
+def test_modal_opened_elsewhere_is_rebuilt_and_submitted():
+    seen = []
+
+    async def scenario(h):
+        r = await h.post(modal_submit(78, "echo:1", {"answer": "hello"}))
+        assert r.status == 202
+        assert seen == [("modal", "echo:1", "hello")]
+        assert h.callbacks == [78]
+    run_offline(scenario, modal_factory=lambda cid: EchoModal(cid, seen) if cid.startswith("echo:") else None)
+
+
+@pytest.fixture
+def bot(tmp_path, monkeypatch):
+    """main.py with its data files in tmp_path and today's question open for answers."""
+    from simulation import main  # simulation provides the env main.py needs at import
+
+    for attr, name in [("QUESTIONS_FILE", "questions.json"), ("SCORES_FILE", "user_scores.json"),
+                       ("STATE_FILE", "daily_state.json"), ("STATS_FILE", "user_stats.json")]:
+        monkeypatch.setattr(main, attr, str(tmp_path / name))
+    monkeypatch.setattr(main, "current_date", lambda: main.START_DATE + datetime.timedelta(days=3))
+    monkeypatch.setattr(main, "limiter", ratelimit.TokenBucketLimiter(main.RATE_LIMITS))
+    return main
+
+
+def test_modal_submit_is_credited_to_the_signed_in_user_only(bot):
+    qid = bot.todays_question_index()
+
+    async def scenario(h):
+        # Member 42 replays member 99's modal id: rejected, nobody is credited
+        spoofed = modal_submit(80, f"qotd:answer:{qid}:99", {"answer": "not mine"}, user_id=42)
+        assert (await h.post(spoofed)).status == 202
+        spoofed = modal_submit(81, "qotd:submit:99", {"question": "Whose?"}, user_id=42)
+        assert (await h.post(spoofed)).status == 202
+        assert bot.load_scores() == {}
+        assert bot.load_state()["answers"] == {}
+        assert bot.load_questions() == []
+
+        own = modal_submit(82, f"qotd:answer:{qid}:42", {"answer": "mine"}, user_id=42)
+        assert (await h.post(own)).status == 202
+        assert h.callbacks == [80, 81, 82]
+
+    run_offline(scenario, modal_factory=bot.rebuild_modal)
+    scores = bot.load_scores()
+    assert list(scores) == ["42"] and scores["42"]["answered"] == [qid]
+    assert bot.load_state()["answers"] == {"42": {"answer": "mine", "anonymous": False}}
+
+
+def test_request_never_outlives_the_ack_budget():
+    ack_timeout = 0.3
+
+    class SilentModal(EchoModal):
+        async def on_submit(self, interaction):
+            pass  # never acknowledges
+
+    def slow_factory(custom_id):
+        time.sleep(0.2)  # e.g. slow disk: eats into the same budget
+        return SilentModal(custom_id, [])
+
+    async def scenario(h):
+        start = time.monotonic()
+        r = await h.post(modal_submit(90, "echo:slow", {"answer": "x"}))
+        assert r.status == 202
+        assert time.monotonic() - start < ack_timeout + 0.1
+
+    run_offline(scenario, modal_factory=slow_factory, ack_timeout=ack_timeout)
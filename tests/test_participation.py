@@ -0,0 +1,113 @@
+import pytest
+
+import participation as p
+
+
+def answered(stats, uid, *qids):
+    for qid in qids:
+        p.record_question(stats, qid)
+        p.record_answer(stats, uid, qid)
+
+
+def test_consecutive_answers_build_a_streak_and_gaps_reset_it():
+    stats = p.new_stats()
+    for qid in range(6):
+        p.record_question(stats, qid)
+        if qid != 3:
+            p.record_answer(stats, "1", qid)
+    user = stats["users"]["1"]
+    assert user["best_streak"] == 3 and user["current_streak"] == 2
+    assert stats["guild"]["best_streak"] == {"uid": "1", "length": 3}
+
+
+def test_current_streak_expires_after_a_missed_day():
+    stats = p.new_stats()
+    answered(stats, "1", 0, 1)
+    user = stats["users"]["1"]
+    assert p.current_streak(user, 2) == 2  # today's answer may still come
+    assert p.current_streak(user, 3) == 0
+
+
+def test_duplicate_and_stale_answers_are_ignored():
+    stats = p.new_stats()
+    answered(stats, "1", 0, 1, 2)
+    assert p.record_answer(stats, "1", 2) is False
+    assert p.record_answer(stats, "1", 1) is False  # stale modal for yesterday
+    user = stats["users"]["1"]
+    assert (user["answers"], user["last_qid"], user["current_streak"]) == (3, 2, 3)
+    assert stats["guild"]["answer_hist"] == {"3": 1}
+    assert p.record_answer(stats, "1", 3) is True
+    assert user["current_streak"] == 4
+
+
+def test_answer_histogram_tracks_users_per_answer_count():
+    stats = p.new_stats()
+    answered(stats, "1", 0, 1, 2)
+    answered(stats, "2", 1)
+    answered(stats, "3", 2)
+    assert stats["guild"]["answer_hist"] == {"3": 1, "1": 2}
+    assert sum(stats["guild"]["answer_hist"].values()) == len(stats["users"])
+
+
+def test_percentile_counts_ties_as_half():
+    hist = {"1": 2, "3": 1, "5": 1}
+    assert p.percentile(hist, 1) == pytest.approx(25.0)
+    assert p.percentile(hist, 3) == pytest.approx(62.5)
+    assert p.percentile(hist, 6) == pytest.approx(100.0)
+    assert p.percentile({}, 1) == 0.0
+
+
+def test_hist_quantile():
+    hist = {"1": 5, "2": 3, "10": 2}
+    assert p.hist_quantile(hist, 0.5) == 1
+    assert p.hist_quantile(hist, 0.8) == 2
+    assert p.hist_quantile(hist, 0.9) == 10
+    assert p.hist_quantile({}, 0.5) == 0
+
+
+def test_participation_only_counts_questions_since_joining():
+    stats = p.new_stats()
+    for qid in range(4):
+        p.record_question(stats, qid)
+    p.record_answer(stats, "1", 3)
+    summary = p.user_summary(stats, "1", 3)
+    assert stats["users"]["1"]["joined_at"] == 3
+    assert summary["participation"] == pytest.approx(100.0)
+
+
+def test_backfill_counts_unanswered_days_as_posted():
+    stats = p.backfill(p.new_stats(), {"1": {"answered": [0, 5]}})
+    assert stats["guild"]["questions"] == 6
+    summary = p.user_summary(stats, "1", 5)
+    assert summary["participation"] == pytest.approx(100 * 2 / 6)
+    assert summary["best_streak"] == 1
+
+
+def test_backfill_joined_at_is_first_answered_question():
+    stats = p.backfill(p.new_stats(), {"1": {"answered": [0, 1]}, "2": {"answered": [4, 5]}}, questions_posted=10)
+    assert stats["guild"]["questions"] == 10 and stats["guild"]["last_question"] == 9
+    assert stats["users"]["2"]["joined_at"] == 4
+    assert p.user_summary(stats, "2", 9)["participation"] == pytest.approx(100 * 2 / 6)
+    p.record_question(stats, 9)  # today's question already counted by the backfill
+    assert stats["guild"]["questions"] == 10
+
+
+def test_backfill_matches_live_recording():
+    scores = {"1": {"answered": [0, 1, 2, 4]}, "2": {"answered": [1, 2]}, "3": {"answered": [4]}}
+    live = p.new_stats()
+    for qid in range(5):
+        p.record_question(live, qid)
+        for uid, s in scores.items():
+            if qid in s["answered"]:
+                p.record_answer(live, uid, qid)
+    assert p.backfill(p.new_stats(), scores) == live
+
+
+def test_votes_and_results():
+    stats = p.new_stats()
+    p.record_vote(stats, "1")
+    p.record_vote(stats, "2")
+    p.record_results(stats, {"3": 2, "4": 0}, ["3"])
+    assert stats["guild"]["votes"] == 2 and stats["guild"]["voting_rounds"] == 1
+    assert stats["users"]["3"]["votes_received"] == 2 and stats["users"]["3"]["wins"] == 1
+    assert stats["users"]["1"]["votes_cast"] == 1
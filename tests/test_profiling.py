@@ -0,0 +1,119 @@
+"""HandlerProfiler installed on a real CommandTree and ViewStore, driven through create_app.
+
+install() patches discord.py internals (CommandTree._call, View/Modal._scheduled_task,
+ViewStore.schedule_dynamic_item_call), so these tests catch signature changes on upgrade.
+"""
+import asyncio
+import time
+
+import discord
+import pytest
+from discord.ui import Button, DynamicItem
+
+import profiling
+from interactions import button_click, command, run_offline
+
+
+class SlowButton(DynamicItem[Button], template=r"slow:(?P<n>\d+)"):
+    def __init__(self, n):
+        super().__init__(Button(label="Slow", custom_id=f"slow:{n}"))
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        return cls(match["n"])
+
+    async def callback(self, interaction):
+        await asyncio.sleep(0.08)
+        await interaction.response.defer()
+
+
+@pytest.fixture
+def profiler(tmp_path, monkeypatch):
+    # install() patches classes; let monkeypatch put the originals back afterwards
+    for cls, attr in [
+        (discord.ui.View, "_scheduled_task"),
+        (discord.ui.Modal, "_scheduled_task"),
+        (discord.ui.view.ViewStore, "schedule_dynamic_item_call"),
+    ]:
+        monkeypatch.setattr(cls, attr, getattr(cls, attr))
+    return profiling.HandlerProfiler(out_dir=str(tmp_path), threshold_ms=50, sample_rate=1.0, stall_threshold_ms=150)
+
+
+def reports(tmp_path, kind):
+    return {p: p.read_text(encoding="utf-8") for p in sorted(tmp_path.glob(f"{kind}-*.txt"))}
+
+
+def setup_handlers(profiler):
+    def setup(h):
+        @h.tree.command(name="slowcmd")
+        async def slowcmd(interaction):
+            await asyncio.sleep(0.08)
+            await interaction.response.defer()
+
+        @h.tree.command(name="fastcmd")
+        async def fastcmd(interaction):
+            await interaction.response.defer()
+
+        @h.tree.command(name="blocking")
+        async def blocking(interaction):
+            time.sleep(0.5)  # blocks the event loop
+            await interaction.response.defer()
+
+        h.client.add_dynamic_items(SlowButton)
+        profiler.install(h.tree)
+    return setup
+
+
+def test_slow_command_and_dynamic_item_are_reported(profiler, tmp_path):
+    async def scenario(h):
+        assert (await h.post(command(1, "fastcmd"))).status == 202
+        assert (await h.post(command(2, "slowcmd"))).status == 202
+        assert (await h.post(button_click(3, "slow:7", label="Slow"))).status == 202
+
+    run_offline(scenario, setup_handlers(profiler))
+    profiler.flush()
+    assert profiler.slow_calls == 2
+    found = reports(tmp_path, "slow")
+    names = sorted(text.splitlines()[0] for text in found.values())
+    assert names == ["handler: /slowcmd", "handler: SlowButton[slow:7]"]
+    assert all("cumulative" in text for text in found.values())  # sampled with sample_rate=1
+    assert len(list(tmp_path.glob("slow-*.prof"))) == 2
+    assert not profiler.active
+
+
+def test_blocking_handler_triggers_stall_report(profiler, tmp_path):
+    async def scenario(h):
+        profiler.start_watchdog()
+        try:
+            assert (await h.post(command(4, "blocking"))).status == 202
+            await asyncio.sleep(0.1)
+        finally:
+            profiler.stop_watchdog()
+
+    run_offline(scenario, setup_handlers(profiler))
+    profiler.flush()
+    assert profiler.stalls == 1
+    (text,) = reports(tmp_path, "stall").values()
+    assert "running handlers:\n  /blocking" in text
+    assert "in blocking" in text  # the loop thread's stack points at the blocking handler
+    assert profiler.slow_calls == 1
+    (slow,) = reports(tmp_path, "slow").values()
+    assert slow.startswith("handler: /blocking")
+
+
+def test_scheduled_task_loops_are_wrapped(profiler, tmp_path):
+    from discord.ext import tasks
+
+    @tasks.loop(seconds=60)
+    async def nightly():
+        await asyncio.sleep(0.06)
+
+    class Tree:
+        async def _call(self, interaction):
+            pass
+
+    profiler.install(Tree(), [nightly])
+    asyncio.run(nightly.coro())
+    profiler.flush()
+    (text,) = reports(tmp_path, "slow").values()
+    assert text.startswith("handler: task:nightly")
@@ -0,0 +1,69 @@
+import pytest
+
+from ratelimit import TokenBucketLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make(limits=None, **kwargs):
+    clock = Clock()
+    return TokenBucketLimiter(limits or {"click": (3, 1 / 2)}, clock=clock, **kwargs), clock
+
+
+def test_burst_up_to_capacity_then_retry_after():
+    limiter, clock = make()
+    assert [limiter.acquire("click", 1) for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire("click", 1) == pytest.approx(2.0)
+    clock.now = 0.5
+    assert limiter.acquire("click", 1) == pytest.approx(1.5)
+
+
+def test_tokens_refill_at_rate_and_cap_at_capacity():
+    limiter, clock = make()
+    for _ in range(3):
+        limiter.acquire("click", 1)
+    clock.now = 2.0
+    assert limiter.acquire("click", 1) == 0
+    assert limiter.acquire("click", 1) > 0
+    clock.now = 1000.0
+    assert [limiter.acquire("click", 1) for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire("click", 1) > 0
+
+
+def test_users_and_actions_have_separate_buckets():
+    limiter, _ = make({"click": (1, 1), "vote": (1, 1)})
+    assert limiter.acquire("click", 1) == 0
+    assert limiter.acquire("click", 2) == 0
+    assert limiter.acquire("vote", 1) == 0
+    assert limiter.acquire("click", 1) > 0
+
+
+def test_unlimited_action_is_always_admitted_and_untracked():
+    limiter, _ = make()
+    assert all(limiter.acquire("other", 1) == 0 for _ in range(10))
+    assert limiter.stats()["tracked"] == 0
+
+
+def test_least_recently_used_bucket_is_evicted():
+    limiter, _ = make({"click": (1, 0.001)}, max_keys=2)
+    limiter.acquire("click", 1)
+    limiter.acquire("click", 2)
+    limiter.acquire("click", 1)  # touches user 1, so user 2 is now the oldest
+    limiter.acquire("click", 3)
+    stats = limiter.stats()
+    assert stats["tracked"] == 2 and stats["evicted"] == 1
+    assert limiter.acquire("click", 2) == 0  # evicted, starts again with a full bucket
+    assert limiter.acquire("click", 3) > 0
+
+
+def test_stats_count_admitted_and_throttled():
+    limiter, _ = make({"click": (1, 1)})
+    limiter.acquire("click", 1)
+    limiter.acquire("click", 1)
+    assert limiter.stats() == {"admitted": {"click": 1}, "throttled": {"click": 1}, "tracked": 1, "evicted": 0}
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+import simulation
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope="module")
+def run(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp("sim")
+    report = simulation.simulate(days=3, users=5, seed=7, data_dir=str(data_dir), answer_rate=0.9, submit_rate=0.3)
+    return report, load(data_dir / "user_scores.json"), load(data_dir / "user_stats.json")
+
+
+def test_insight_points_are_answers_plus_wins(run):
+    report, scores, stats = run
+    answers = sum(len(s["answered"]) for s in scores.values())
+    wins = sum(u["wins"] for u in stats["users"].values())
+    assert answers > 0 and wins > 0
+    assert report["points"]["insight"] == answers + wins
+
+
+def test_participation_matches_answered_lists(run):
+    report, scores, stats = run
+    part = report["participation"]
+    assert part["questions"] == 3
+    assert part["answers"] - part["anonymous_answers"] == sum(len(s["answered"]) for s in scores.values())
+    for uid, s in scores.items():
+        assert len(set(s["answered"])) == len(s["answered"])
+        if s["answered"]:
+            user = stats["users"][uid]
+            assert user["answers"] - user["anonymous_answers"] == len(s["answered"])
+
+
+def test_every_phase_and_handler_is_timed(run):
+    report, _, _ = run
+    phases = {name for _, name, _ in simulation.scheduled_phases()}
+    assert phases <= set(report["timings"])
+    for handler in ("QuestionView.button", "AnswerModal.on_submit", "VoteButton.callback"):
+        assert handler in report["timings"]
+    assert all(t["calls"] == 3 for name, t in report["timings"].items() if name in phases)
+
+
+def test_seeded_runs_are_reproducible(run, tmp_path):
+    report, _, _ = run
+    again = simulation.simulate(days=3, users=5, seed=7, data_dir=str(tmp_path), answer_rate=0.9, submit_rate=0.3)
+    assert again["points"] == report["points"]
+    assert again["participation"] == report["participation"]
+
+
+def test_refuses_non_empty_data_dir(tmp_path):
+    (tmp_path / "user_scores.json").write_text("{}")
+    with pytest.raises(simulation.DataDirError):
+        simulation.simulate(days=1, users=1, data_dir=str(tmp_path))
+    assert (tmp_path / "user_scores.json").read_text() == "{}"
+
+
+def test_cli_rejects_start_date_before_first_question(capsys):
+    with pytest.raises(SystemExit):
+        simulation.main_cli(["--start-date", "2020-01-01"])
+    assert "--start-date" in capsys.readouterr().err